@@ -1,6 +1,24 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        from . import signals  # noqa: F401
+        from .performance import instrument_serializers
+        from .shopping_list import FONT_NAME
+
+        if settings.PERFORMANCE_METRICS:
+            instrument_serializers()
+
+        pdfmetrics.registerFont(
+            TTFont(FONT_NAME, os.path.join(settings.BASE_DIR, "Verdana.ttf"))
+        )
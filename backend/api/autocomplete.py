@@ -0,0 +1,60 @@
+import bisect
+import threading
+
+from recipes.models import Ingredient
+from .cache import get_namespace_version
+
+CACHE_NAMESPACE = "ingredients"
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.version = None
+        self.keys = []
+        self.ingredients = []
+        self.lock = threading.Lock()
+
+    def load(self):
+        entries = sorted(
+            (
+                (name.lower(), pk),
+                Ingredient(id=pk, name=name, measurement_unit=unit),
+            )
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            ).iterator()
+        )
+        self.keys = [key for (key, _), _ in entries]
+        self.ingredients = [ingredient for _, ingredient in entries]
+
+    def refresh(self):
+        version = get_namespace_version(CACHE_NAMESPACE)
+        if version == self.version:
+            return
+        with self.lock:
+            if version != self.version:
+                self.load()
+                self.version = version
+
+    def search(self, query, limit):
+        self.refresh()
+        keys, ingredients = self.keys, self.ingredients
+        query = query.lower()
+        start = bisect.bisect_left(keys, query)
+        position = start
+        while (
+            position < len(keys) and position - start < limit
+            and keys[position].startswith(query)
+        ):
+            position += 1
+        result = ingredients[start:position]
+        if len(result) < limit:
+            for key, ingredient in zip(keys, ingredients):
+                if query in key and not key.startswith(query):
+                    result.append(ingredient)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from rest_framework.response import Response
+
+CACHE_TIMEOUT = 24 * 60 * 60
+RECIPE_COUNT_NAMESPACE = "recipe_counts"
+SUBSCRIPTION_COUNT_NAMESPACE = "subscription_counts"
+STATS_EVENTS = ("hits", "misses")
+
+
+def get_namespace_version(namespace):
+    key = f"{namespace}:version"
+    cache.add(key, 1, None)
+    return cache.get(key, 1)
+
+
+def bump_namespace_version(namespace):
+    key = f"{namespace}:version"
+    cache.add(key, 1, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+        return 2
+
+
+def get_user_namespace(namespace, user_id):
+    return f"{namespace}:{user_id}"
+
+
+def record_event(namespace, event):
+    key = f"{namespace}:stats:{event}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cache_stats(namespaces):
+    keys = {
+        f"{namespace}:stats:{event}": (namespace, event)
+        for namespace in namespaces
+        for event in STATS_EVENTS
+    }
+    values = cache.get_many(keys)
+    stats = {
+        namespace: dict.fromkeys(STATS_EVENTS, 0) for namespace in namespaces
+    }
+    for key, (namespace, event) in keys.items():
+        stats[namespace][event] = values.get(key, 0)
+    return stats
+
+
+class CachedReadOnlyMixin:
+    cache_namespace = None
+    uncached_params = ()
+
+    def get_cache_key(self, request):
+        version = get_namespace_version(self.cache_namespace)
+        return (
+            f"{self.cache_namespace}:{version}:{self.action}:"
+            f"{request.get_full_path()}"
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        params = request.query_params
+        if any(param in params for param in self.uncached_params):
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_event(self.cache_namespace, "hits")
+            return Response(data)
+        record_event(self.cache_namespace, "misses")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
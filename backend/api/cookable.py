@@ -0,0 +1,146 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.core.cache import cache
+
+from recipes.models import RecipeIngredient
+from recipes.transactions import CommitBatch
+from .cache import bump_namespace_version, get_namespace_version
+
+CACHE_NAMESPACE = "recipe_ingredients"
+CHANGES_TIMEOUT = 60 * 60
+
+
+def get_changes_key(version):
+    return f"{CACHE_NAMESPACE}:{version}:changes"
+
+
+class CookableIndex:
+    def __init__(self):
+        self.version = None
+        self.postings = {}
+        self.totals = array("H")
+        self.lock = threading.Lock()
+
+    def build(self, rows):
+        postings = defaultdict(lambda: array("q"))
+        for ingredient_id, recipe_id in rows:
+            postings[ingredient_id].append(recipe_id)
+        self.postings = {
+            ingredient_id: array("q", sorted(recipe_ids))
+            for ingredient_id, recipe_ids in postings.items()
+        }
+        totals = Counter(chain.from_iterable(self.postings.values()))
+        self.totals = array("H", bytes(2 * (max(totals, default=0) + 1)))
+        for recipe_id, total in totals.items():
+            self.totals[recipe_id] = total
+
+    def load(self):
+        self.build(
+            RecipeIngredient.objects.order_by()
+            .values_list("ingredient_id", "recipe_id")
+            .distinct()
+            .iterator()
+        )
+
+    def apply(self, changes):
+        for recipe_id, ingredient_ids in changes.items():
+            if recipe_id < len(self.totals) and self.totals[recipe_id]:
+                for ingredient_id in list(self.postings):
+                    recipe_ids = self.postings[ingredient_id]
+                    position = bisect_left(recipe_ids, recipe_id)
+                    if (
+                        position < len(recipe_ids)
+                        and recipe_ids[position] == recipe_id
+                    ):
+                        del recipe_ids[position]
+                        if not recipe_ids:
+                            del self.postings[ingredient_id]
+                self.totals[recipe_id] = 0
+            ingredient_ids = set(ingredient_ids)
+            if not ingredient_ids:
+                continue
+            for ingredient_id in ingredient_ids:
+                insort(
+                    self.postings.setdefault(ingredient_id, array("q")),
+                    recipe_id,
+                )
+            if recipe_id >= len(self.totals):
+                self.totals.extend(
+                    array("H", bytes(2 * (recipe_id + 1 - len(self.totals))))
+                )
+            self.totals[recipe_id] = len(ingredient_ids)
+
+    def refresh(self):
+        version = get_namespace_version(CACHE_NAMESPACE)
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            if self.version is not None and version > self.version:
+                keys = [
+                    get_changes_key(number)
+                    for number in range(self.version + 1, version + 1)
+                ]
+                changes = cache.get_many(keys)
+                if len(changes) == len(keys):
+                    for key in keys:
+                        self.apply(changes[key])
+                    self.version = version
+                    return
+            self.load()
+            self.version = version
+
+    def rank(self, ingredient_ids, min_coverage=0.0):
+        ranking = []
+        with self.lock:
+            postings = self.postings
+            matches = Counter(chain.from_iterable(
+                postings.get(ingredient_id, ())
+                for ingredient_id in set(ingredient_ids)
+            ))
+            totals = self.totals
+            for recipe_id, matched in matches.items():
+                total = totals[recipe_id]
+                coverage = matched / total
+                if coverage >= min_coverage:
+                    ranking.append((coverage, matched, recipe_id, total))
+        ranking.sort(reverse=True)
+        return ranking
+
+    def search(self, ingredient_ids, min_coverage=0.0):
+        self.refresh()
+        return self.rank(ingredient_ids, min_coverage)
+
+    def get_memory_size(self):
+        return (
+            sum(
+                recipe_ids.buffer_info()[1] * recipe_ids.itemsize
+                for recipe_ids in self.postings.values()
+            )
+            + self.totals.buffer_info()[1] * self.totals.itemsize
+        )
+
+
+cookable_index = CookableIndex()
+
+
+def publish_recipe_ingredients(recipe_ids):
+    changes = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list("recipe_id", "ingredient_id"):
+        changes[recipe_id].append(ingredient_id)
+    version = bump_namespace_version(CACHE_NAMESPACE)
+    cache.set(get_changes_key(version), changes, CHANGES_TIMEOUT)
+
+
+cookable_updates = CommitBatch(publish_recipe_ingredients)
+
+
+def schedule_cookable_update(*recipe_ids):
+    cookable_updates.add(*recipe_ids)
@@ -1,15 +1,45 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Recipe
+from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
+from .autocomplete import ingredient_index
+from .cache import CACHE_TIMEOUT, get_namespace_version
+from .membership import get_recipe_membership
 
 User = get_user_model()
 
+RecipeTag = Recipe.tags.through
+
+TAGS_ANY = "any"
+TAGS_ALL = "all"
+
+
+def get_tag_ids():
+    key = f"tags:{get_namespace_version('tags')}:slug_ids"
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list("slug", "id"))
+        cache.set(key, tag_ids, CACHE_TIMEOUT)
+    return tag_ids
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
 
 class RecipesFilter(FilterSet):
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method="filter_tags"
+    )
+    tags_mode = filters.ChoiceFilter(
+        choices=((TAGS_ANY, TAGS_ANY), (TAGS_ALL, TAGS_ALL)),
+        method="filter_tags_mode",
+    )
     is_favorited = filters.BooleanFilter(method="filter_favorited")
     is_in_shopping_cart = filters.BooleanFilter(method="filter_shopping_cart")
 
@@ -17,16 +47,66 @@ class RecipesFilter(FilterSet):
         model = Recipe
         fields = ("tags", "author")
 
+    def filter_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids()
+        ids = {tag_ids[slug] for slug in value if slug in tag_ids}
+        if not ids:
+            return queryset
+        if self.form.cleaned_data.get("tags_mode") == TAGS_ALL:
+            return queryset.filter(id__in=(
+                RecipeTag.objects.filter(tag_id__in=ids)
+                .values("recipe_id")
+                .annotate(matched=Count("tag_id"))
+                .filter(matched=len(ids))
+                .values("recipe_id")
+            ))
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe_id=OuterRef("pk"), tag_id__in=ids
+        )))
+
+    def filter_tags_mode(self, queryset, name, value):
+        return queryset
+
     def filter_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(favorited_recipe__user=self.request.user)
+            membership = get_recipe_membership(self.request)
+            return queryset.filter(id__in=membership.favorites)
         return queryset
 
     def filter_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(shopping_cart__user=self.request.user)
+            membership = get_recipe_membership(self.request)
+            return queryset.filter(id__in=membership.shopping_cart)
         return queryset
 
 
-class IngredientSearchFilter(SearchFilter):
+class IngredientSearchFilter(BaseFilterBackend):
     search_param = "name"
+    limit_param = "limit"
+    default_limit = 20
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return limit if limit > 0 else self.default_limit
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query or view.action != "list":
+            return queryset
+        return ingredient_index.search(query, self.get_limit(request))
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    search_param = "search"
+
+    def get_query(self, request):
+        return request.query_params.get(self.search_param, "").strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_query(request)
+        if not query:
+            return queryset
+        return search_recipes(queryset, query)
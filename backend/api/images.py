@@ -0,0 +1,231 @@
+import base64
+import binascii
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, transaction
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image, ImageOps
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import ImageStatus, Recipe
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SUFFIX = "-upload"
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+THUMBNAILS_DIR = "recipes/thumbnails"
+THUMBNAIL_SIZES = (200, 480, 960)
+THUMBNAIL_FORMATS = (("webp", "WEBP"), ("jpg", "JPEG"))
+IMAGE_FORMATS = {"RGB": ("jpg", "JPEG"), "RGBA": ("png", "PNG")}
+PLACEHOLDER = object()
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix="recipe-image",
+        )
+    return _executor
+
+
+def build_url(request, url):
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_placeholder_url(request):
+    return build_url(request, settings.RECIPE_IMAGE_PLACEHOLDER)
+
+
+def has_transparency(image):
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def prepare_image(file, max_size):
+    image = Image.open(file)
+    image.draft("RGB", (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size))
+    if has_transparency(image):
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def encode_image(image, image_format):
+    output = io.BytesIO()
+    if image_format == "JPEG":
+        if image.mode == "RGBA":
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        image.save(
+            output, "JPEG",
+            quality=JPEG_QUALITY, optimize=True, progressive=True,
+        )
+    elif image_format == "WEBP":
+        image.save(output, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(output, image_format, optimize=True)
+    return output.getvalue()
+
+
+def get_thumbnail_prefix(image_name):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f"{THUMBNAILS_DIR}/{stem}-"
+
+
+def get_thumbnail_name(image_name, size, extension):
+    return f"{get_thumbnail_prefix(image_name)}{size}.{extension}"
+
+
+def save_thumbnails(image, image_name):
+    for size in THUMBNAIL_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        for extension, image_format in THUMBNAIL_FORMATS:
+            name = get_thumbnail_name(image_name, size, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(
+                name, ContentFile(encode_image(thumbnail, image_format))
+            )
+
+
+def delete_thumbnails(image_name):
+    for size in THUMBNAIL_SIZES:
+        for extension, _ in THUMBNAIL_FORMATS:
+            default_storage.delete(
+                get_thumbnail_name(image_name, size, extension)
+            )
+
+
+def get_thumbnail_urls(request, recipe):
+    if recipe.image_status != ImageStatus.READY:
+        url = get_placeholder_url(request)
+    elif not recipe.image:
+        return None
+    elif recipe.thumbnails_for != recipe.image.name:
+        url = build_url(request, recipe.image.url)
+    else:
+        prefix = build_url(request, default_storage.url(
+            get_thumbnail_prefix(recipe.image.name)
+        ))
+        return {
+            str(size): {
+                extension: f"{prefix}{size}.{extension}"
+                for extension, _ in THUMBNAIL_FORMATS
+            }
+            for size in THUMBNAIL_SIZES
+        }
+    return {
+        str(size): {extension: url for extension, _ in THUMBNAIL_FORMATS}
+        for size in THUMBNAIL_SIZES
+    }
+
+
+def generate_thumbnails(recipe_id, image_name):
+    with default_storage.open(image_name) as file:
+        image = prepare_image(file, max(THUMBNAIL_SIZES))
+    save_thumbnails(image, image_name)
+    return Recipe.objects.filter(id=recipe_id, image=image_name).update(
+        thumbnails_for=image_name
+    )
+
+
+def process_recipe_image(recipe_id, upload_name):
+    close_old_connections()
+    try:
+        with default_storage.open(upload_name) as file:
+            image = prepare_image(file, settings.RECIPE_IMAGE_MAX_SIZE)
+        extension, image_format = IMAGE_FORMATS[image.mode]
+        stem = os.path.splitext(upload_name)[0]
+        if stem.endswith(UPLOAD_SUFFIX):
+            stem = stem[:-len(UPLOAD_SUFFIX)]
+        name = default_storage.save(
+            f"{stem}.{extension}",
+            ContentFile(encode_image(image, image_format)),
+        )
+        save_thumbnails(image, name)
+    except Exception:
+        logger.exception("Не удалось обработать изображение %s", upload_name)
+        Recipe.objects.filter(id=recipe_id, image=upload_name).update(
+            image_status=ImageStatus.FAILED
+        )
+        return None
+    else:
+        updated = Recipe.objects.filter(
+            id=recipe_id, image=upload_name
+        ).update(
+            image=name, image_status=ImageStatus.READY, thumbnails_for=name
+        )
+        if not updated:
+            delete_thumbnails(name)
+            default_storage.delete(name)
+            default_storage.delete(upload_name)
+            return None
+        default_storage.delete(upload_name)
+        return name
+    finally:
+        close_old_connections()
+
+
+def schedule_recipe_image(recipe):
+    recipe_id, upload_name = recipe.id, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS > 0:
+            get_executor().submit(process_recipe_image, recipe_id, upload_name)
+        else:
+            process_recipe_image(recipe_id, upload_name)
+
+    transaction.on_commit(submit)
+
+
+class RecipeImageField(Base64ImageField):
+    def get_attribute(self, instance):
+        if getattr(instance, "image_status", None) in (
+            ImageStatus.PENDING, ImageStatus.FAILED
+        ):
+            return PLACEHOLDER
+        return super().get_attribute(instance)
+
+    def to_representation(self, file):
+        if file is PLACEHOLDER:
+            return get_placeholder_url(self.context.get("request"))
+        return super().to_representation(file)
+
+    def to_internal_value(self, base64_data):
+        if not isinstance(base64_data, str):
+            return super().to_internal_value(base64_data)
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if ";base64," in base64_data:
+            base64_data = base64_data.split(";base64,")[1]
+        try:
+            decoded_file = base64.b64decode(base64_data)
+        except (TypeError, binascii.Error, ValueError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        file_name = str(uuid.uuid4())
+        file_extension = self.get_file_extension(file_name, decoded_file)
+        if file_extension not in self.ALLOWED_TYPES:
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        return SimpleUploadedFile(
+            name=f"{file_name}{UPLOAD_SUFFIX}.{file_extension}",
+            content=decoded_file,
+        )
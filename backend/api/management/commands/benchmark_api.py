@@ -0,0 +1,541 @@
+import base64
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.urls import URLResolver, resolve
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.counters import repair_recipe_counters, repair_recipes_counts
+from recipes.models import (FavoritedRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Subscription
+from api import urls as api_urls
+
+User = get_user_model()
+
+PASSWORD = "benchmark-password"
+API_PREFIX = "/api/"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def image_b64():
+    output = io.BytesIO()
+    Image.new("RGB", (16, 16), "orange").save(output, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        output.getvalue()
+    ).decode()
+
+
+def get_route_names(patterns, prefix="", seen=None):
+    seen = {} if seen is None else seen
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            get_route_names(pattern.url_patterns, route, seen)
+        elif pattern.name and route not in seen:
+            seen[route] = pattern.name
+    return set(seen.values())
+
+
+def get_git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_ingredients(path):
+    if not os.path.exists(path):
+        raise CommandError(
+            f"Файл {path} не найден, укажите путь через --ingredients"
+        )
+    with open(path, encoding="utf-8") as file:
+        return [
+            Ingredient(name=row[0], measurement_unit=row[1])
+            for row in csv.reader(file)
+            if len(row) >= 2
+        ]
+
+
+def seed(options):
+    rnd = random.Random(options["seed"])
+    Ingredient.objects.bulk_create(
+        read_ingredients(options["ingredients"]), batch_size=1000
+    )
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    Tag.objects.bulk_create(
+        Tag(name=f"Тег {i}", slug=f"tag-{i}", color=f"#{i * 2654435:06x}"[:7])
+        for i in range(options["tags"])
+    )
+    tag_ids = list(Tag.objects.values_list("id", flat=True))
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(
+            username=f"bench{i}",
+            email=f"bench{i}@example.com",
+            first_name="Имя",
+            last_name="Фамилия",
+            password=password,
+        )
+        for i in range(options["users"])
+    )
+    user_ids = list(User.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=rnd.choice(user_ids),
+                name=f"Рецепт {i}",
+                image=f"recipes/benchmark-{i}.jpg",
+                text="Описание рецепта " * 20,
+                cooking_time=rnd.randint(1, 120),
+            )
+            for i in range(options["recipes"])
+        ),
+        batch_size=1000,
+    )
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rnd.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rnd.sample(ingredient_ids, rnd.randint(3, 10))
+        ),
+        batch_size=1000,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rnd.sample(tag_ids, min(len(tag_ids), 2))
+        ),
+        batch_size=1000,
+    )
+    for model, count in (
+        (FavoritedRecipe, options["favorites"]),
+        (ShoppingCart, options["cart"]),
+    ):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rnd.sample(
+                    recipe_ids, min(count, len(recipe_ids))
+                )
+            ),
+            batch_size=1000,
+        )
+    Subscription.objects.bulk_create(
+        (
+            Subscription(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rnd.sample(
+                [author_id for author_id in user_ids if author_id != user_id],
+                min(options["subscriptions"], len(user_ids) - 1),
+            )
+        ),
+        batch_size=1000,
+    )
+    repair_recipe_counters()
+    repair_recipes_counts()
+
+
+class Scenario:
+    def __init__(self, name, method, path, client="user", data=None,
+                 setup=None, cleanup=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.client = client
+        self.data = data
+        self.setup = setup
+        self.cleanup = cleanup
+
+
+class Benchmark:
+    def __init__(self):
+        self.user = User.objects.order_by("id").first()
+        self.admin = User.objects.create_superuser(
+            username="bench-admin",
+            email="bench-admin@example.com",
+            password=PASSWORD,
+            first_name="Админ",
+            last_name="Админ",
+        )
+        self.guest = User.objects.create_user(
+            username="bench-guest",
+            email="bench-guest@example.com",
+            password=PASSWORD,
+            first_name="Гость",
+            last_name="Гость",
+        )
+        self.recipe = Recipe.objects.exclude(author=self.user).exclude(
+            favorited_recipe__user=self.user
+        ).exclude(shopping_cart__user=self.user).first()
+        self.own_recipe = self.create_recipe()
+        self.author = User.objects.exclude(id=self.user.id).exclude(
+            following__user=self.user
+        ).exclude(id__in=(self.admin.id, self.guest.id)).first()
+        self.tag = Tag.objects.first()
+        self.ingredients = list(Ingredient.objects.all()[:5])
+        self.clients = {
+            "anon": APIClient(),
+            "user": self.get_client(self.user),
+            "admin": self.get_client(self.admin),
+        }
+
+    def get_client(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    def create_recipe(self):
+        recipe = Recipe.objects.create(
+            author=self.user,
+            name="Рецепт для удаления",
+            image="recipes/benchmark.jpg",
+            text="Описание",
+            cooking_time=10,
+        )
+        recipe.tags.add(Tag.objects.first())
+        return recipe
+
+    def recipe_payload(self, name):
+        return {
+            "name": name,
+            "text": "Описание рецепта",
+            "cooking_time": 15,
+            "tags": [self.tag.id],
+            "ingredients": [
+                {"id": ingredient.id, "amount": index + 1}
+                for index, ingredient in enumerate(self.ingredients)
+            ],
+            "image": image_b64(),
+        }
+
+    def get_scenarios(self):
+        recipe = self.recipe.id
+        own = self.own_recipe.id
+        author = self.author.id
+        user = self.user
+        return [
+            Scenario("api-root", "get", "", client="anon"),
+            Scenario("tags-list", "get", "tags/", client="anon"),
+            Scenario("tags-detail", "get", f"tags/{self.tag.id}/",
+                     client="anon"),
+            Scenario("ingredients-list", "get", "ingredients/",
+                     client="anon"),
+            Scenario("ingredients-search", "get", "ingredients/?name=сол",
+                     client="anon"),
+            Scenario("ingredients-detail", "get",
+                     f"ingredients/{self.ingredients[0].id}/",
+                     client="anon"),
+            Scenario("recipes-list-anon", "get", "recipes/?limit=6",
+                     client="anon"),
+            Scenario("recipes-list", "get", "recipes/?limit=6"),
+            Scenario("recipes-list-page-10", "get",
+                     "recipes/?limit=6&page=10"),
+            Scenario("recipes-list-cursor", "get",
+                     "recipes/?limit=6&pagination=cursor"),
+            Scenario("recipes-list-filters", "get",
+                     f"recipes/?limit=6&tags={self.tag.slug}"
+                     f"&is_favorited=1"),
+            Scenario("recipes-list-cart", "get",
+                     "recipes/?limit=6&is_in_shopping_cart=1"),
+            Scenario("recipes-list-author", "get",
+                     f"recipes/?limit=6&author={author}"),
+            Scenario("recipes-detail", "get", f"recipes/{recipe}/"),
+            Scenario("recipes-create", "post", "recipes/",
+                     data=self.recipe_payload("Новый рецепт"),
+                     cleanup=lambda response: Recipe.objects.filter(
+                         id=response.data["id"]
+                     ).delete()),
+            Scenario("recipes-update", "patch", f"recipes/{own}/",
+                     data=self.recipe_payload("Обновленный рецепт")),
+            Scenario("recipes-delete", "delete", "recipes/{recipe}/",
+                     setup=lambda: {"recipe": self.create_recipe().id}),
+            Scenario("recipes-favorite-add", "post",
+                     f"recipes/{recipe}/favorite/",
+                     cleanup=lambda response: FavoritedRecipe.objects.filter(
+                         user=user, recipe_id=recipe
+                     ).delete()),
+            Scenario("recipes-favorite-remove", "delete",
+                     f"recipes/{recipe}/favorite/",
+                     setup=lambda: FavoritedRecipe.objects.create(
+                         user=user, recipe_id=recipe
+                     )),
+            Scenario("recipes-cart-add", "post",
+                     f"recipes/{recipe}/shopping_cart/",
+                     cleanup=lambda response: ShoppingCart.objects.filter(
+                         user=user, recipe_id=recipe
+                     ).delete()),
+            Scenario("recipes-cart-remove", "delete",
+                     f"recipes/{recipe}/shopping_cart/",
+                     setup=lambda: ShoppingCart.objects.create(
+                         user=user, recipe_id=recipe
+                     )),
+            Scenario("recipes-download-cart-pdf", "get",
+                     "recipes/download_shopping_cart/?format=pdf"),
+            Scenario("recipes-download-cart-txt", "get",
+                     "recipes/download_shopping_cart/?format=txt"),
+            Scenario("users-list-anon", "get", "users/?limit=6",
+                     client="anon"),
+            Scenario("users-list", "get", "users/?limit=6"),
+            Scenario("users-detail", "get", f"users/{author}/"),
+            Scenario("users-me", "get", "users/me/"),
+            Scenario("users-subscriptions", "get",
+                     "users/subscriptions/?limit=6&recipes_limit=3"),
+            Scenario("users-subscribe", "post", f"users/{author}/subscribe/",
+                     cleanup=lambda response: Subscription.objects.filter(
+                         user=user, author_id=author
+                     ).delete()),
+            Scenario("users-unsubscribe", "delete",
+                     f"users/{author}/subscribe/",
+                     setup=lambda: Subscription.objects.create(
+                         user=user, author_id=author
+                     )),
+            Scenario("users-create", "post", "users/", client="anon",
+                     data={
+                         "username": "bench-new",
+                         "email": "bench-new@example.com",
+                         "first_name": "Новый",
+                         "last_name": "Пользователь",
+                         "password": PASSWORD,
+                     },
+                     cleanup=lambda response: User.objects.filter(
+                         username="bench-new"
+                     ).delete()),
+            Scenario("users-set-password", "post", "users/set_password/",
+                     data={
+                         "current_password": PASSWORD,
+                         "new_password": PASSWORD,
+                     }),
+            Scenario("login", "post", "auth/token/login/", client="anon",
+                     data={
+                         "email": self.guest.email, "password": PASSWORD,
+                     }),
+            Scenario("logout", "post", "auth/token/logout/",
+                     setup=lambda: {"client": self.get_client(self.guest)}),
+            Scenario("cache-stats", "get", "cache/stats/", client="admin"),
+        ]
+
+    def setup(self, scenario):
+        extra = scenario.setup() if scenario.setup else None
+        return extra if isinstance(extra, dict) else {}
+
+    def request(self, scenario, extra):
+        client = extra.get("client") or self.clients[scenario.client]
+        path = API_PREFIX + scenario.path.format(**extra)
+        return getattr(client, scenario.method)(
+            path, scenario.data, format="json"
+        )
+
+    def measure(self, scenario, iterations):
+        timings = []
+        queries = []
+        status_code = None
+        for _ in range(iterations):
+            extra = self.setup(scenario)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = self.request(scenario, extra)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+            status_code = response.status_code
+            if scenario.cleanup:
+                scenario.cleanup(response)
+        extra = self.setup(scenario)
+        tracemalloc.start()
+        response = self.request(scenario, extra)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if scenario.cleanup:
+            scenario.cleanup(response)
+        return {
+            "route": resolve(
+                API_PREFIX + scenario.path.split("?")[0].format(**extra)
+            ).url_name,
+            "method": scenario.method.upper(),
+            "path": API_PREFIX + scenario.path,
+            "status": status_code,
+            "queries_cold": queries[0],
+            "queries": int(percentile(queries, 50)),
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "peak_alloc_kb": round(peak / 1024, 1),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет тестовую базу синтетическими данными и замеряет "
+        "количество запросов к БД, задержку и память для маршрутов API"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--tags", type=int, default=8)
+        parser.add_argument(
+            "--favorites", type=int, default=20,
+            help="Рецептов в избранном у каждого пользователя",
+        )
+        parser.add_argument(
+            "--cart", type=int, default=10,
+            help="Рецептов в корзине у каждого пользователя",
+        )
+        parser.add_argument(
+            "--subscriptions", type=int, default=10,
+            help="Подписок у каждого пользователя",
+        )
+        parser.add_argument(
+            "--ingredients",
+            default=os.path.join(
+                settings.BASE_DIR.parent, "data", "ingredients.csv"
+            ),
+            help="CSV-файл с ингредиентами",
+        )
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--only", nargs="+", default=None,
+            help="Запустить только перечисленные сценарии",
+        )
+        parser.add_argument(
+            "--output", default="benchmark.json",
+            help="Файл для результатов в формате JSON",
+        )
+        parser.add_argument(
+            "--compare", default=None,
+            help="Файл с предыдущими результатами для сравнения",
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"] and not os.path.exists(options["compare"]):
+            raise CommandError(f"Файл {options['compare']} не найден")
+        media_root = tempfile.mkdtemp()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root, RECIPE_IMAGE_WORKERS=0
+            ):
+                cache.clear()
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Результаты записаны в {options['output']}")
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                self.compare(json.load(file), results)
+
+    def run(self, options):
+        started = time.perf_counter()
+        seed(options)
+        self.stdout.write(
+            f"Данные созданы за {time.perf_counter() - started:.1f} с"
+        )
+        benchmark = Benchmark()
+        scenarios = benchmark.get_scenarios()
+        if options["only"]:
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario.name in options["only"]
+            ]
+        self.stdout.write(
+            f"{'scenario':<28} {'status':>6} {'cold':>5} {'queries':>7} "
+            f"{'p50':>9} {'p95':>9} {'peak':>9}"
+        )
+        routes = {}
+        for scenario in scenarios:
+            result = benchmark.measure(scenario, options["iterations"])
+            routes[scenario.name] = result
+            self.stdout.write(
+                f"{scenario.name:<28} {result['status']:>6} "
+                f"{result['queries_cold']:>5} {result['queries']:>7} "
+                f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+                f"{result['peak_alloc_kb']:>7.0f}KB"
+            )
+        covered = {result["route"] for result in routes.values()}
+        uncovered = sorted(get_route_names(api_urls.urlpatterns) - covered)
+        if uncovered:
+            self.stdout.write("Маршруты без замеров: " + ", ".join(uncovered))
+        return {
+            "meta": {
+                "revision": get_git_revision(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "iterations": options["iterations"],
+                "scale": {
+                    key: options[key]
+                    for key in (
+                        "users", "recipes", "tags", "favorites", "cart",
+                        "subscriptions",
+                    )
+                },
+                "ingredients": Ingredient.objects.count(),
+            },
+            "routes": routes,
+            "uncovered": uncovered,
+        }
+
+    def compare(self, previous, current):
+        self.stdout.write(
+            f"Сравнение с {previous['meta'].get('revision') or 'предыдущим'}:"
+        )
+        for name, result in current["routes"].items():
+            old = previous["routes"].get(name)
+            if old is None:
+                continue
+            queries = result["queries"] - old["queries"]
+            ratio = result["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1
+            marker = " !" if queries > 0 or ratio > 1.2 else ""
+            self.stdout.write(
+                f"{name:<28} queries {old['queries']:>3} -> "
+                f"{result['queries']:<3} p50 {old['p50_ms']:>8.2f} -> "
+                f"{result['p50_ms']:<8.2f}ms ({ratio:.2f}x){marker}"
+            )
@@ -0,0 +1,141 @@
+import random
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+from api.cookable import CookableIndex
+
+
+def generate_rows(recipes, ingredients, rows, seed):
+    generator = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(ingredients)]
+    per_recipe = max(rows // recipes, 1)
+    for recipe_id in range(1, recipes + 1):
+        for ingredient_id in set(generator.choices(
+            range(1, ingredients + 1), weights, k=per_recipe
+        )):
+            yield ingredient_id, recipe_id
+
+
+def build_sets(rows):
+    postings = defaultdict(set)
+    totals = {}
+    for ingredient_id, recipe_id in rows:
+        postings[ingredient_id].add(recipe_id)
+        totals[recipe_id] = totals.get(recipe_id, 0) + 1
+    return dict(postings), totals
+
+
+def rank_sets(index, ingredient_ids):
+    postings, totals = index
+    matches = Counter()
+    for ingredient_id in ingredient_ids:
+        matches.update(postings.get(ingredient_id, ()))
+    ranking = [
+        (matched / totals[recipe_id], matched, recipe_id, totals[recipe_id])
+        for recipe_id, matched in matches.items()
+    ]
+    ranking.sort(reverse=True)
+    return ranking
+
+
+def measure(build, rows):
+    started = time.perf_counter()
+    build(rows)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    index = build(rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return index, size, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает память и скорость индекса «что приготовить» на "
+        "массивах с индексом на множествах Python"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=1000000,
+            help="Количество строк рецепт-ингредиент",
+        )
+        parser.add_argument(
+            "--recipes", type=int, default=100000,
+            help="Количество рецептов",
+        )
+        parser.add_argument(
+            "--ingredients", type=int, default=2000,
+            help="Количество ингредиентов",
+        )
+        parser.add_argument(
+            "--queries", type=int, default=200,
+            help="Количество запросов",
+        )
+        parser.add_argument(
+            "--query-size", type=int, default=8,
+            help="Количество ингредиентов в запросе",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+
+    def build_arrays(self, rows):
+        index = CookableIndex()
+        index.build(rows)
+        return index
+
+    def handle(self, *args, **options):
+        rows = list(generate_rows(
+            options["recipes"], options["ingredients"], options["rows"],
+            options["seed"],
+        ))
+        self.stdout.write(
+            f"Строк - {len(rows):,}, рецептов - {options['recipes']:,}, "
+            f"ингредиентов - {options['ingredients']:,}"
+        )
+        arrays, arrays_size, arrays_build = measure(self.build_arrays, rows)
+        sets, sets_size, sets_build = measure(build_sets, rows)
+        generator = random.Random(options["seed"])
+        queries = [
+            generator.sample(
+                range(1, options["ingredients"] + 1), options["query_size"]
+            )
+            for _ in range(options["queries"])
+        ]
+        timings = {}
+        for name, rank in (
+            ("array", lambda query: arrays.rank(query)),
+            ("set", lambda query: rank_sets(sets, query)),
+        ):
+            durations = []
+            for query in queries:
+                started = time.perf_counter()
+                rank(query)
+                durations.append(time.perf_counter() - started)
+            durations.sort()
+            timings[name] = (
+                durations[len(durations) // 2],
+                durations[min(len(durations) - 1, len(durations) * 95 // 100)],
+            )
+        for query in queries[:10]:
+            if arrays.rank(query) != rank_sets(sets, query):
+                self.stderr.write(f"Результаты расходятся: {query}")
+        self.stdout.write(
+            f"{'index':>6}  {'memory':>10}  {'build':>8}  "
+            f"{'p50':>9}  {'p95':>9}"
+        )
+        for name, size, build in (
+            ("array", arrays_size, arrays_build),
+            ("set", sets_size, sets_build),
+        ):
+            p50, p95 = timings[name]
+            self.stdout.write(
+                f"{name:>6}  {size / 2 ** 20:>8.1f}MB  {build:>7.2f}s  "
+                f"{p50 * 1000:>7.2f}ms  {p95 * 1000:>7.2f}ms"
+            )
+        self.stdout.write(
+            f"Индекс на массивах занимает {arrays_size / sets_size:.0%} "
+            f"памяти индекса на множествах"
+        )
@@ -0,0 +1,42 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from api.autocomplete import ingredient_index
+from api.filters import IngredientSearchFilter
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = "Сравнивает поиск ингредиентов через ORM и через индекс в памяти"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queries", nargs="+",
+            default=["с", "со", "сол", "мол", "ку", "карт"],
+            help="Поисковые запросы",
+        )
+        parser.add_argument(
+            "--number", type=int, default=100,
+            help="Количество повторов каждого запроса",
+        )
+
+    def handle(self, *args, **options):
+        limit = IngredientSearchFilter.default_limit
+        number = options["number"]
+        ingredient_index.refresh()
+        self.stdout.write(f"{'query':>8}  {'orm':>10}  {'index':>10}")
+        for query in options["queries"]:
+            orm = timeit.timeit(
+                lambda: list(
+                    Ingredient.objects.filter(name__istartswith=query)
+                ),
+                number=number,
+            )
+            index = timeit.timeit(
+                lambda: ingredient_index.search(query, limit), number=number
+            )
+            self.stdout.write(
+                f"{query:>8}  {orm / number * 1e6:>8.1f}us"
+                f"  {index / number * 1e6:>8.1f}us"
+            )
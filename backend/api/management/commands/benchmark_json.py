@@ -0,0 +1,71 @@
+import io
+import timeit
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeSerializer
+from api.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    help = "Сравнивает стандартный JSON-рендерер DRF и рендерер на orjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[6, 50, 500],
+            help="Количество рецептов в ответе",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5,
+            help="Количество повторов для каждого замера",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("Пакет orjson не установлен")
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = AnonymousUser()
+        view = RecipeViewSet(request=request, format_kwarg=None)
+        renderers = (JSONRenderer(), FastJSONRenderer())
+        parsers = (JSONParser(), FastJSONParser())
+        self.stdout.write(
+            f"{'recipes':>7}  {'kb':>7}  {'render':>10}  {'orjson':>10}"
+            f"  {'parse':>10}  {'orjson':>10}"
+        )
+        for size in options["sizes"]:
+            recipes = list(view.get_queryset()[:size])
+            if len(recipes) < size:
+                raise CommandError(
+                    f"В базе только {len(recipes)} рецептов, нужно {size}"
+                )
+            data = RecipeSerializer(
+                recipes, many=True, context={"request": request}
+            ).data
+            rendered = [renderer.render(data) for renderer in renderers]
+            if rendered[0] != rendered[1]:
+                raise CommandError("Результаты рендеринга различаются")
+            body = rendered[0]
+            timings = [
+                min(timeit.repeat(
+                    lambda: renderer.render(data),
+                    number=1, repeat=options["repeat"],
+                )) * 1000
+                for renderer in renderers
+            ] + [
+                min(timeit.repeat(
+                    lambda: parser.parse(io.BytesIO(body), parser_context={}),
+                    number=1, repeat=options["repeat"],
+                )) * 1000
+                for parser in parsers
+            ]
+            self.stdout.write(
+                f"{size:>7}  {len(body) / 1024:>7.1f}  "
+                + "  ".join(f"{timing:>8.2f}ms" for timing in timings)
+            )
@@ -0,0 +1,71 @@
+import timeit
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeRelationsResolver, RecipeSerializer
+from api.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает сериализацию списка рецептов через поля DRF "
+        "и через быстрый путь списка"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[6, 50, 500],
+            help="Количество рецептов на странице",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5,
+            help="Количество повторов для каждого замера",
+        )
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = AnonymousUser()
+        view = RecipeViewSet(request=request, format_kwarg=None)
+        context = {"request": request}
+        renderer = JSONRenderer()
+        self.stdout.write(f"{'recipes':>7}  {'fields':>10}  {'fast':>10}")
+        for size in options["sizes"]:
+            recipes = list(view.get_queryset()[:size])
+            if len(recipes) < size:
+                raise CommandError(
+                    f"В базе только {len(recipes)} рецептов, нужно {size}"
+                )
+
+            def serialize_fields():
+                fields_context = dict(
+                    context,
+                    recipe_resolver=RecipeRelationsResolver(request, recipes),
+                )
+                return [
+                    RecipeSerializer(recipe, context=fields_context).data
+                    for recipe in recipes
+                ]
+
+            def serialize_fast():
+                return RecipeSerializer(
+                    recipes, many=True, context=dict(context)
+                ).data
+
+            if renderer.render(serialize_fields()) != renderer.render(
+                serialize_fast()
+            ):
+                raise CommandError("Результаты сериализации различаются")
+            timings = [
+                min(timeit.repeat(
+                    serialize, number=1, repeat=options["repeat"]
+                )) * 1000
+                for serialize in (serialize_fields, serialize_fast)
+            ]
+            self.stdout.write(
+                f"{size:>7}  "
+                + "  ".join(f"{timing:>8.2f}ms" for timing in timings)
+            )
@@ -0,0 +1,58 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+
+INGREDIENTS_PER_RECIPE = 8
+INGREDIENTS_TOTAL = 2188
+
+
+def build_cart(recipes_count):
+    rows_count = min(recipes_count * INGREDIENTS_PER_RECIPE, INGREDIENTS_TOTAL)
+    return [
+        {
+            "name": f"ингредиент {number}",
+            "measurement_unit": "г",
+            "amount": recipes_count * (number % 7 + 1),
+        }
+        for number in range(rows_count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Сравнивает время формирования списка покупок в разных форматах"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10, 100, 1000],
+            help="Количество рецептов в корзине",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5,
+            help="Количество повторов для каждого замера",
+        )
+
+    def handle(self, *args, **options):
+        renderers = {
+            "pdf": PDFRenderer().render,
+            "csv": CSVRenderer().render,
+            "txt": PlainTextRenderer().render,
+            "json": JSONRenderer().render,
+        }
+        self.stdout.write(
+            "recipes  rows  " + "  ".join(f"{name:>9}" for name in renderers)
+        )
+        for size in options["sizes"]:
+            cart = build_cart(size)
+            timings = [
+                min(timeit.repeat(
+                    lambda: render(cart), number=1, repeat=options["repeat"]
+                )) * 1000
+                for render in renderers.values()
+            ]
+            self.stdout.write(
+                f"{size:>7}  {len(cart):>4}  "
+                + "  ".join(f"{timing:>7.2f}ms" for timing in timings)
+            )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.models import Ingredient, Recipe
+
+EXPECTED_INDEXES = {
+    "postgresql": {
+        "istartswith": ("_upper_idx", "_trgm_idx"),
+        "icontains": ("_trgm_idx",),
+        "exact": ("_name_idx",),
+    },
+    "sqlite": {
+        "exact": ("_name_idx",),
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Проверяет через EXPLAIN, что поиск по названию использует индексы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query", default="сол", help="Строка поиска для проверки"
+        )
+        parser.add_argument(
+            "--verbose-plans", action="store_true",
+            help="Выводить полные планы запросов",
+        )
+
+    def handle(self, *args, **options):
+        lookups = EXPECTED_INDEXES.get(connection.vendor)
+        if not lookups:
+            raise CommandError(
+                f"Проверка не поддерживается для {connection.vendor}"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        failed = []
+        for model in (Ingredient, Recipe):
+            for lookup, index_suffixes in lookups.items():
+                queryset = model.objects.filter(
+                    **{f"name__{lookup}": options["query"]}
+                ).order_by()
+                plan = queryset.explain()
+                used = any(suffix in plan for suffix in index_suffixes)
+                label = f"{model.__name__}.name__{lookup}"
+                self.stdout.write(
+                    f"{label:<30} {'index' if used else 'NO INDEX'}"
+                )
+                if options["verbose_plans"] or not used:
+                    self.stdout.write(plan)
+                if not used:
+                    failed.append(label)
+        if failed:
+            raise CommandError(
+                f"Индексы не используются: {', '.join(failed)}"
+            )
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import F
+
+from recipes.models import ImageStatus, Recipe
+from api.images import generate_thumbnails
+
+
+def generate(recipe):
+    close_old_connections()
+    try:
+        return generate_thumbnails(*recipe)
+    except Exception as error:
+        return error
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Создает миниатюры для уже загруженных изображений рецептов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Пересоздать миниатюры, даже если они уже есть",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4,
+            help="Количество потоков",
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.filter(
+            image_status=ImageStatus.READY
+        ).exclude(image="")
+        if not options["force"]:
+            recipes = recipes.exclude(thumbnails_for=F("image"))
+        recipes = list(recipes.values_list("id", "image"))
+        generated = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = executor.map(generate, recipes)
+            for recipe, result in zip(recipes, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    self.stderr.write(f"{recipe[1]}: {result}")
+                else:
+                    generated += result
+        self.stdout.write(
+            f"Созданы миниатюры для рецептов - {generated}, ошибок - {failed}"
+        )
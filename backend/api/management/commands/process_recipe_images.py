@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ImageStatus, Recipe
+from api.images import process_recipe_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Обрабатывает загруженные изображения рецептов, которые не успели "
+        "обработаться в фоне"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--failed", action="store_true",
+            help="Повторить обработку изображений, завершившихся ошибкой",
+        )
+
+    def handle(self, *args, **options):
+        statuses = [ImageStatus.PENDING]
+        if options["failed"]:
+            statuses.append(ImageStatus.FAILED)
+        recipes = Recipe.objects.filter(image_status__in=statuses).values_list(
+            "id", "image"
+        )
+        processed = failed = 0
+        for recipe_id, image in recipes.iterator():
+            if process_recipe_image(recipe_id, image) is None:
+                failed += 1
+            else:
+                processed += 1
+        self.stdout.write(
+            f"Обработано изображений - {processed}, ошибок - {failed}"
+        )
@@ -0,0 +1,69 @@
+from array import array
+
+from django.core.cache import cache
+
+from recipes.models import FavoritedRecipe, ShoppingCart
+from .cache import (bump_namespace_version, get_namespace_version,
+                    get_user_namespace)
+
+MEMBERSHIP_TIMEOUT = 60 * 60
+MEMBERSHIP_NAMES = {
+    FavoritedRecipe: "favorites",
+    ShoppingCart: "shopping_cart",
+}
+
+
+def get_membership_namespace(model, user_id):
+    return get_user_namespace(
+        f"recipe_membership:{MEMBERSHIP_NAMES[model]}", user_id
+    )
+
+
+def get_membership_key(model, user_id):
+    namespace = get_membership_namespace(model, user_id)
+    return f"{namespace}:{get_namespace_version(namespace)}"
+
+
+def load_recipe_ids(model, user_id):
+    key = get_membership_key(model, user_id)
+    recipe_ids = cache.get(key)
+    if recipe_ids is None:
+        recipe_ids = array("q", sorted(
+            model.objects.filter(user_id=user_id)
+            .values_list("recipe_id", flat=True)
+        ))
+        cache.set(key, recipe_ids, MEMBERSHIP_TIMEOUT)
+    return set(recipe_ids)
+
+
+def invalidate_recipe_ids(model, user_id):
+    bump_namespace_version(get_membership_namespace(model, user_id))
+
+
+class RecipeMembership:
+    def __init__(self, user):
+        self.user = user
+        self.recipe_ids = {}
+
+    def get_recipe_ids(self, model):
+        if not self.user.is_authenticated:
+            return set()
+        if model not in self.recipe_ids:
+            self.recipe_ids[model] = load_recipe_ids(model, self.user.id)
+        return self.recipe_ids[model]
+
+    @property
+    def favorites(self):
+        return self.get_recipe_ids(FavoritedRecipe)
+
+    @property
+    def shopping_cart(self):
+        return self.get_recipe_ids(ShoppingCart)
+
+
+def get_recipe_membership(request):
+    membership = getattr(request, "recipe_membership", None)
+    if membership is None:
+        membership = RecipeMembership(request.user)
+        request.recipe_membership = membership
+    return membership
@@ -1,6 +1,96 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+COUNT_CACHE_TIMEOUT = 60
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimate_count(model):
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < ESTIMATE_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    def __init__(self, object_list, per_page, count_key=None,
+                 estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            if self.estimate and settings.ESTIMATED_COUNTS:
+                count = estimate_count(self.object_list.model)
+            if count is None:
+                count = super().count
+            cache.set(self.count_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class IdCursorPagination(CursorPagination):
+    page_size_query_param = "limit"
+    page_size = 6
+    ordering = "-id"
+
+
+class RankedPagination(PageNumberPagination):
+    page_size_query_param = "limit"
+    page_size = 6
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = "limit"
     page_size = 6
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    cursor_pagination_class = IdCursorPagination
+    cursor_paginator = None
+
+    def use_cursor(self, queryset, request):
+        mode = request.query_params.get(self.mode_query_param)
+        ordering = self.cursor_pagination_class.ordering
+        return (
+            mode == self.cursor_mode
+            and queryset.query.order_by in ((), (ordering,))
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(queryset, request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        get_count_filters = getattr(view, "get_count_filters", None)
+        count_filters = get_count_filters() if get_count_filters else None
+        if count_filters is not None:
+            namespace, filters = count_filters
+            self.django_paginator_class = partial(
+                CachedCountPaginator,
+                count_key=":".join((namespace, "count", *filters)),
+                estimate=not filters,
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,226 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger("api.performance")
+
+HISTOGRAM_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+WINDOW_SIZE = 1000
+TIMINGS = ("sql", "serialize", "render")
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.action = None
+        self.sql_count = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.serialize_depth = 0
+        self.render = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.sql_count += 1
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+        response.add_post_render_callback(self.finish_render)
+        return response
+
+    def finish_render(self, response):
+        self.render += time.perf_counter() - self.render_started
+
+    def server_timing(self, duration):
+        return ", ".join((
+            f'db;dur={self.sql * 1000:.1f};desc="{self.sql_count} queries"',
+            f"serialize;dur={self.serialize * 1000:.1f}",
+            f"render;dur={self.render * 1000:.1f}",
+            f"total;dur={duration * 1000:.1f}",
+        ))
+
+    def as_dict(self, duration):
+        return {
+            "action": self.action,
+            "duration_ms": round(duration * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql * 1000, 2),
+            "serialize_ms": round(self.serialize * 1000, 2),
+            "render_ms": round(self.render * 1000, 2),
+        }
+
+
+class ActionStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.sql_count = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+        self.window = deque(maxlen=WINDOW_SIZE)
+
+    def add(self, metrics, duration):
+        self.count += 1
+        self.total += duration
+        index = bisect_left(HISTOGRAM_BUCKETS, duration)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.sql_count += metrics.sql_count
+        for name in TIMINGS:
+            self.timings[name] += getattr(metrics, name)
+        self.window.append(duration)
+
+    def percentile(self, pct):
+        window = sorted(self.window)
+        return window[min(len(window) - 1, int(len(window) * pct / 100))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "mean_sql_count": round(self.sql_count / self.count, 2),
+            **{
+                f"mean_{name}_ms": round(
+                    self.timings[name] / self.count * 1000, 2
+                )
+                for name in TIMINGS
+            },
+        }
+
+
+class PerformanceRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.actions = defaultdict(ActionStats)
+
+    def add(self, metrics, duration):
+        with self.lock:
+            self.actions[metrics.action].add(metrics, duration)
+
+    def summary(self):
+        with self.lock:
+            return {
+                action: stats.summary()
+                for action, stats in sorted(self.actions.items())
+            }
+
+    def histograms(self):
+        with self.lock:
+            return {
+                action: {
+                    "buckets": dict(zip(HISTOGRAM_BUCKETS, stats.buckets)),
+                    "count": stats.count,
+                    "sum": stats.total,
+                    "sql_count": stats.sql_count,
+                    **{
+                        f"{name}_seconds": stats.timings[name]
+                        for name in TIMINGS
+                    },
+                }
+                for action, stats in sorted(self.actions.items())
+            }
+
+
+registry = PerformanceRegistry()
+
+
+def get_action_name(view_func, method):
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+def instrument_serializers():
+    # Подменяет BaseSerializer.data во всем процессе, поэтому вне запроса,
+    # который замеряет middleware, работает исходное свойство.
+    data = BaseSerializer.data
+    if getattr(data.fget, "instrumented", False):
+        return
+
+    def timed_data(serializer):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return data.fget(serializer)
+        metrics.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            metrics.serialize_depth -= 1
+            if not metrics.serialize_depth:
+                metrics.serialize += time.perf_counter() - started
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def can_see_server_timing(request):
+    if not settings.PERFORMANCE_SERVER_TIMING:
+        return False
+    user = getattr(request, "user", None)
+    return user is not None and user.is_staff
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(metrics)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration = time.perf_counter() - metrics.started
+        if metrics.action is None:
+            metrics.action = "unresolved"
+        registry.add(metrics, duration)
+        if can_see_server_timing(request):
+            response["Server-Timing"] = metrics.server_timing(duration)
+        if logger.isEnabledFor(logging.INFO):
+            data = metrics.as_dict(duration)
+            data.update(
+                method=request.method,
+                path=request.path,
+                status=response.status_code,
+            )
+            logger.info(json.dumps(data, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_metrics.get().action = get_action_name(
+            view_func, request.method
+        )
+
+    def process_template_response(self, request, response):
+        return current_metrics.get().start_render(response)
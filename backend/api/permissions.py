@@ -3,4 +3,7 @@ from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.method in SAFE_METHODS or obj.author == request.user
+        return (
+            request.method in SAFE_METHODS
+            or obj.author_id == request.user.id
+        )
@@ -0,0 +1,122 @@
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .shopping_list import (format_lines, render_csv, render_pdf,
+                            render_txt)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def use_fallback(self, data, accepted_media_type, renderer_context):
+        return (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context)
+            is not None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if self.use_fallback(data, accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            "\u2028".encode(), b"\\u2028"
+        ).replace("\u2029".encode(), b"\\u2029")
+
+
+class ShoppingListRenderer(BaseRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.render_list(data).encode(self.charset)
+
+    def render_to_file(self, data, file):
+        file.write(self.render(data))
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+    def render_list(self, data):
+        return render_txt(data)
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def render_list(self, data):
+        return render_csv(data)
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        file = io.BytesIO()
+        self.render_to_file(data, file)
+        return file.getvalue()
+
+    def render_to_file(self, data, file):
+        render_pdf(format_lines(data), file)
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+    prefix = "foodgram_request"
+
+    def render_action(self, action, data):
+        label = f'action="{action}"'
+        bucket = f"{self.prefix}_duration_seconds_bucket"
+        lines = []
+        cumulative = 0
+        for bound, count in data["buckets"].items():
+            cumulative += count
+            lines.append(f'{bucket}{{{label},le="{bound}"}} {cumulative}')
+        lines.extend((
+            f'{bucket}{{{label},le="+Inf"}} {data["count"]}',
+            f"{self.prefix}_duration_seconds_sum{{{label}}} {data['sum']:.6f}",
+            f"{self.prefix}_duration_seconds_count{{{label}}} {data['count']}",
+            f"{self.prefix}_sql_queries_total{{{label}}} {data['sql_count']}",
+        ))
+        for name in ("sql", "serialize", "render"):
+            lines.append(
+                f"{self.prefix}_{name}_seconds_total{{{label}}} "
+                f"{data[f'{name}_seconds']:.6f}"
+            )
+        return lines
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if "actions" not in data:
+            return "\n".join(
+                f"# {key}: {value}" for key, value in data.items()
+            ).encode(self.charset)
+        lines = [
+            f"# TYPE {self.prefix}_duration_seconds histogram",
+            f"# TYPE {self.prefix}_sql_queries_total counter",
+            f"# TYPE {self.prefix}_sql_seconds_total counter",
+            f"# TYPE {self.prefix}_serialize_seconds_total counter",
+            f"# TYPE {self.prefix}_render_seconds_total counter",
+        ]
+        for action, action_data in data["actions"].items():
+            lines.extend(self.render_action(action, action_data))
+        return ("\n".join(lines) + "\n").encode(self.charset)
@@ -0,0 +1,104 @@
+from operator import attrgetter
+
+from recipes.models import ImageStatus
+from .images import get_placeholder_url, get_thumbnail_urls
+
+TAG_FIELDS = ("id", "name", "color", "slug")
+USER_FIELDS = ("email", "id", "username", "first_name", "last_name")
+
+
+def compile_representation(fields):
+    getter = attrgetter(*fields)
+
+    def represent(obj):
+        return dict(zip(fields, getter(obj)))
+
+    return represent
+
+
+tag_to_dict = compile_representation(TAG_FIELDS)
+user_fields_to_dict = compile_representation(USER_FIELDS)
+
+
+def is_subscribed(request, user):
+    current_user = request.user
+    if not current_user.is_authenticated:
+        return False
+    if hasattr(user, "is_subscribed"):
+        return user.is_subscribed
+    return current_user.follower.filter(author=user).exists()
+
+
+def user_to_dict(request, user):
+    data = user_fields_to_dict(user)
+    data["is_subscribed"] = is_subscribed(request, user)
+    return data
+
+
+def image_to_url(request, image):
+    if not image:
+        return None
+    url = image.url
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def recipe_image_to_url(request, recipe):
+    if recipe.image_status != ImageStatus.READY:
+        return get_placeholder_url(request)
+    return image_to_url(request, recipe.image)
+
+
+def ingredients_to_list(recipe):
+    return [
+        {
+            "id": recipe_ingredient.ingredient.pk,
+            "name": str(recipe_ingredient.ingredient.name),
+            "measurement_unit": str(
+                recipe_ingredient.ingredient.measurement_unit
+            ),
+            "amount": recipe_ingredient.amount,
+        }
+        for recipe_ingredient in recipe.recipe_ingredient_recipe.all()
+    ]
+
+
+def recipe_to_dict(request, recipe, resolver, membership):
+    flags_visible = (
+        request.method != "POST" and request.user.is_authenticated
+    )
+    return {
+        "id": recipe.id,
+        "tags": resolver.get_tags(recipe),
+        "author": resolver.get_author(recipe),
+        "ingredients": ingredients_to_list(recipe),
+        "is_favorited": (
+            flags_visible and recipe.id in membership.favorites
+        ),
+        "is_in_shopping_cart": (
+            flags_visible and recipe.id in membership.shopping_cart
+        ),
+        "name": recipe.name,
+        "image": recipe_image_to_url(request, recipe),
+        "thumbnails": get_thumbnail_urls(request, recipe),
+        "text": recipe.text,
+        "cooking_time": recipe.cooking_time,
+    }
+
+
+def short_recipe_to_dict(recipe):
+    return {
+        "id": recipe.id,
+        "name": recipe.name,
+        "image": recipe_image_to_url(None, recipe),
+        "thumbnails": get_thumbnail_urls(None, recipe),
+        "cooking_time": recipe.cooking_time,
+    }
+
+
+def subscription_to_dict(request, user, recipes):
+    data = user_to_dict(request, user)
+    data["recipes"] = [short_recipe_to_dict(recipe) for recipe in recipes]
+    data["recipes_count"] = user.recipes_count
+    return data
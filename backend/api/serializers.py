@@ -1,11 +1,21 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import (Exists, Manager, OuterRef, Prefetch,
+                              prefetch_related_objects)
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.validators import UniqueValidator
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.models import (ImageStatus, Ingredient, Recipe, RecipeIngredient,
+                            Tag)
+from .images import (RecipeImageField, get_thumbnail_urls,
+                     schedule_recipe_image)
+from .membership import get_recipe_membership
+from .representations import (is_subscribed, recipe_to_dict,
+                              subscription_to_dict, tag_to_dict,
+                              user_to_dict)
+from .shopping_list import schedule_recipe_cart_update
 
 User = get_user_model()
 
@@ -19,6 +29,13 @@ class ShortUserSerializer(UserSerializer):
         )
 
 
+class UserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        users = data.all() if isinstance(data, Manager) else data
+        request = self.context.get("request")
+        return [user_to_dict(request, user) for user in users]
+
+
 class CustomUserSerializer(UserCreateSerializer):
     email = serializers.EmailField(
         validators=[UniqueValidator(queryset=User.objects.all())],
@@ -48,15 +65,10 @@ class CustomUserSerializer(UserCreateSerializer):
             "password",
             "is_subscribed"
         )
+        list_serializer_class = UserListSerializer
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return (
-                obj.is_subscribed if hasattr(obj, 'is_subscribed')
-                else user.follower.filter(author=obj).exists()
-            )
-        return False
+        return is_subscribed(self.context.get('request'), obj)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -83,10 +95,73 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+def prefetch_recipe_relations(*recipes):
+    prefetch_related_objects(
+        recipes,
+        "tags",
+        Prefetch(
+            "recipe_ingredient_recipe",
+            queryset=RecipeIngredient.objects.select_related("ingredient"),
+        ),
+    )
+
+
+class RecipeRelationsResolver:
+    def __init__(self, request, recipes):
+        self.request = request
+        self.recipes = recipes
+        self.authors = {}
+        self.tags = {}
+
+    def load_authors(self, author_ids):
+        queryset = User.objects.filter(id__in=author_ids)
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                user.follower.filter(author=OuterRef("id"))
+            ))
+        self.authors.update(
+            (author.id, user_to_dict(self.request, author))
+            for author in queryset
+        )
+
+    def get_author(self, recipe):
+        if recipe.author_id not in self.authors:
+            author_ids = {recipe.author_id}
+            author_ids.update(item.author_id for item in self.recipes)
+            self.recipes = []
+            self.load_authors(author_ids - self.authors.keys())
+        return self.authors[recipe.author_id]
+
+    def get_tags(self, recipe):
+        tags = []
+        for tag in recipe.tags.all():
+            if tag.id not in self.tags:
+                self.tags[tag.id] = tag_to_dict(tag)
+            tags.append(self.tags[tag.id])
+        return tags
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, Manager) else data
+        recipes = list(recipes)
+        request = self.context.get("request")
+        resolver = RecipeRelationsResolver(request, recipes)
+        self.context["recipe_resolver"] = resolver
+        membership = get_recipe_membership(request)
+        prefetch_recipe_relations(*recipes)
+        return [
+            recipe_to_dict(request, recipe, resolver, membership)
+            for recipe in recipes
+        ]
+
+
 class RecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
-    tags = TagSerializer(read_only=True, many=True)
-    author = CustomUserSerializer(read_only=True)
+    image = RecipeImageField()
+    thumbnails = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
+    author = serializers.SerializerMethodField()
     ingredients = RecipeIngredientSerializer(
         source="recipe_ingredient_recipe", read_only=True, many=True
     )
@@ -104,36 +179,66 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "thumbnails",
             "text",
             "cooking_time",
         )
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, instance):
+        prefetch_recipe_relations(instance)
+        return super().to_representation(instance)
 
     def get_is_favorited(self, obj):
         if self.context.get('request').method == 'POST':
             return False
         if self.context.get('request').user.is_authenticated:
-            return obj.is_favorited
+            return obj.id in self.get_membership().favorites
         return False
 
     def get_is_in_shopping_cart(self, obj):
         if self.context.get('request').method == 'POST':
             return False
         if self.context.get('request').user.is_authenticated:
-            return obj.is_in_shopping_cart
+            return obj.id in self.get_membership().shopping_cart
         return False
 
+    def get_thumbnails(self, obj):
+        return get_thumbnail_urls(self.context.get("request"), obj)
+
+    def get_membership(self):
+        return get_recipe_membership(self.context.get('request'))
+
+    def get_resolver(self, obj):
+        resolver = self.context.get("recipe_resolver")
+        if resolver is None:
+            resolver = RecipeRelationsResolver(
+                self.context.get("request"), [obj]
+            )
+            self.context["recipe_resolver"] = resolver
+        return resolver
+
+    def get_tags(self, obj):
+        return self.get_resolver(obj).get_tags(obj)
+
+    def get_author(self, obj):
+        return self.get_resolver(obj).get_author(obj)
+
     def validate(self, data):
         added_ingredients = []
         ingredients_data = self.initial_data.get("ingredients")
         for ingredient_item in ingredients_data:
-            get_object_or_404(Ingredient, id=ingredient_item["id"])
-            if ingredient_item["id"] in added_ingredients:
+            try:
+                ingredient_id = int(ingredient_item["id"])
+            except (TypeError, ValueError):
+                raise NotFound({"error": "Ошибка! Ингредиент не найден!"})
+            if ingredient_id in added_ingredients:
                 raise serializers.ValidationError({
                     "error":
                         f"Ошибка! Нельзя добавлять несколько одинаковых"
                         f" ингредиентов!"
                 })
-            added_ingredients.append(ingredient_item["id"])
+            added_ingredients.append(ingredient_id)
             if type(ingredient_item["amount"]) != int:
                 try:
                     item = int(ingredient_item["amount"])
@@ -149,39 +254,106 @@ class RecipeSerializer(serializers.ModelSerializer):
                             f"Ошибка! Количество ингредиента должно быть "
                             f"числом!"
                     })
+        existing_ingredients = Ingredient.objects.filter(
+            id__in=added_ingredients
+        ).count()
+        if existing_ingredients != len(added_ingredients):
+            raise NotFound({"error": "Ошибка! Ингредиент не найден!"})
         data["ingredients"] = ingredients_data
         return data
 
     def serialize_ingredients_data(self, ingredients_data, recipe):
-        for ingredient in ingredients_data:
-            RecipeIngredient.objects.create(
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 ingredient_id=ingredient.get("id"),
                 amount=ingredient.get("amount"),
                 recipe=recipe,
             )
+            for ingredient in ingredients_data
+        )
 
+    def update_ingredients_data(self, ingredients_data, recipe):
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredient_recipe.all()
+        }
+        amounts = {
+            int(ingredient.get("id")): int(ingredient.get("amount"))
+            for ingredient in ingredients_data
+        }
+        removed = [
+            recipe_ingredient.id
+            for ingredient_id, recipe_ingredient in current.items()
+            if ingredient_id not in amounts
+        ]
+        changed = []
+        added = []
+        for ingredient_id, amount in amounts.items():
+            recipe_ingredient = current.get(ingredient_id)
+            if recipe_ingredient is None:
+                added.append(RecipeIngredient(
+                    ingredient_id=ingredient_id, amount=amount, recipe=recipe
+                ))
+            elif recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        return bool(removed or changed or added)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags_data = self.initial_data.get("tags")
+        validated_data["image_status"] = ImageStatus.PENDING
         recipe = super().create(validated_data)
         recipe.tags.set(tags_data)
         self.serialize_ingredients_data(ingredients_data, recipe)
+        schedule_recipe_image(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags_data = self.initial_data.get("tags")
+        if "image" in validated_data:
+            validated_data["image_status"] = ImageStatus.PENDING
         super().update(instance, validated_data)
+        if "image" in validated_data:
+            schedule_recipe_image(instance)
         instance.tags.set(tags_data)
-        RecipeIngredient.objects.filter(recipe=instance).all().delete()
-        self.serialize_ingredients_data(ingredients_data, instance)
+        if self.update_ingredients_data(ingredients_data, instance):
+            schedule_recipe_cart_update(instance.id)
         return instance
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(read_only=True)
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "thumbnails", "cooking_time")
+
+    def get_thumbnails(self, obj):
+        return get_thumbnail_urls(self.context.get("request"), obj)
+
+
+class SubscriptionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = self.context.get("recipes")
+        if recipes is None:
+            return super().to_representation(data)
+        users = data.all() if isinstance(data, Manager) else data
+        request = self.context.get("request")
+        return [
+            subscription_to_dict(request, user, recipes.get(user.id, []))
+            for user in users
+        ]
 
 
 class SubscriptionSerializer(CustomUserSerializer):
@@ -200,8 +372,14 @@ class SubscriptionSerializer(CustomUserSerializer):
             "recipes",
             "recipes_count",
         )
+        list_serializer_class = SubscriptionListSerializer
 
     def get_recipes(self, obj):
+        recipes = self.context.get("recipes")
+        if recipes is not None:
+            return ShortRecipeSerializer(
+                recipes.get(obj.id, []), many=True
+            ).data
         request = self.context.get("request")
         recipes_limit = request.GET.get("recipes_limit")
         queryset = Recipe.objects.filter(author=obj.id)
@@ -0,0 +1,134 @@
+import csv
+import io
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from reportlab.pdfgen import canvas
+
+from recipes.models import RecipeIngredient, ShoppingCart
+from recipes.transactions import CommitBatch
+
+FONT_NAME = "Verdana"
+TITLE = "Список продуктов для покупки"
+LEFT_MARGIN = 30
+TOP_POSITION = 790
+FIRST_LINE_POSITION = 750
+BOTTOM_MARGIN = 50
+LINE_HEIGHT = 25
+CSV_HEADER = ("name", "measurement_unit", "amount")
+EXPORT_CACHE_TIMEOUT = 24 * 60 * 60
+EXPORT_CACHE_MAX_SIZE = 256 * 1024
+
+
+def get_cart_version_key(user_id):
+    return f"shopping_cart:{user_id}:version"
+
+
+def get_cart_version(user_id):
+    key = get_cart_version_key(user_id)
+    version = time.time_ns() // 1000
+    cache.add(key, version, None)
+    return cache.get(key, version)
+
+
+def bump_cart_versions(user_ids):
+    for user_id in user_ids:
+        try:
+            cache.incr(get_cart_version_key(user_id))
+        except ValueError:
+            pass
+
+
+def bump_recipe_cart_versions(recipe_ids):
+    bump_cart_versions(
+        ShoppingCart.objects.filter(recipe_id__in=recipe_ids)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+
+cart_updates = CommitBatch(bump_cart_versions)
+recipe_cart_updates = CommitBatch(bump_recipe_cart_versions)
+
+
+def schedule_cart_update(*user_ids):
+    cart_updates.add(*user_ids)
+
+
+def schedule_recipe_cart_update(*recipe_ids):
+    recipe_cart_updates.add(*recipe_ids)
+
+
+def get_shopping_cart_export(user, renderer, version):
+    key = f"shopping_cart:{user.id}:{version}:{renderer.format}"
+    content = cache.get(key)
+    if content is not None:
+        return io.BytesIO(content)
+    file = tempfile.TemporaryFile()
+    ingredients = get_shopping_cart_ingredients(user).iterator()
+    render_to_file = getattr(renderer, "render_to_file", None)
+    if render_to_file is None:
+        file.write(renderer.render(list(ingredients)))
+    else:
+        render_to_file(ingredients, file)
+    if file.tell() <= EXPORT_CACHE_MAX_SIZE:
+        file.seek(0)
+        cache.set(key, file.read(), EXPORT_CACHE_TIMEOUT)
+    file.seek(0)
+    return file
+
+
+def get_shopping_cart_ingredients(user):
+    return (
+        RecipeIngredient.objects.filter(recipe__shopping_cart__user=user)
+        .values(
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit"),
+        )
+        .annotate(amount=Sum("amount"))
+        .order_by("name", "measurement_unit")
+    )
+
+
+def format_line(item, ingredient):
+    return (
+        f'{item}. {ingredient["name"].capitalize()} - '
+        f'{ingredient["amount"]} {ingredient["measurement_unit"]}'
+    )
+
+
+def format_lines(ingredients):
+    for item, ingredient in enumerate(ingredients, 1):
+        yield format_line(item, ingredient)
+
+
+def render_txt(ingredients):
+    return "\n".join((TITLE, "", *format_lines(ingredients), ""))
+
+
+def render_csv(ingredients):
+    file = io.StringIO()
+    writer = csv.writer(file)
+    writer.writerow(CSV_HEADER)
+    for ingredient in ingredients:
+        writer.writerow([ingredient[field] for field in CSV_HEADER])
+    return file.getvalue()
+
+
+def render_pdf(lines, file):
+    page = canvas.Canvas(file)
+    page.setFont(FONT_NAME, size=30)
+    page.drawString(LEFT_MARGIN, TOP_POSITION, TITLE)
+    page.setFont(FONT_NAME, size=14)
+    height = FIRST_LINE_POSITION
+    for line in lines:
+        if height < BOTTOM_MARGIN:
+            page.showPage()
+            page.setFont(FONT_NAME, size=14)
+            height = TOP_POSITION
+        page.drawString(LEFT_MARGIN, height, line)
+        height -= LINE_HEIGHT
+    page.showPage()
+    page.save()
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from import_export.signals import post_import
+
+from recipes.models import (FavoritedRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Subscription
+from .cache import (RECIPE_COUNT_NAMESPACE, SUBSCRIPTION_COUNT_NAMESPACE,
+                    bump_namespace_version, get_user_namespace)
+from .cookable import schedule_cookable_update
+from .membership import invalidate_recipe_ids
+from .shopping_list import schedule_cart_update, schedule_recipe_cart_update
+
+CACHE_NAMESPACES = {Tag: "tags", Ingredient: "ingredients"}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_reference_cache(sender, **kwargs):
+    bump_namespace_version(CACHE_NAMESPACES[sender])
+
+
+@receiver(post_import)
+def invalidate_imported_reference_cache(sender, model, **kwargs):
+    if model in CACHE_NAMESPACES:
+        bump_namespace_version(CACHE_NAMESPACES[model])
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_created_recipe_counts(sender, created, **kwargs):
+    if created:
+        bump_namespace_version(RECIPE_COUNT_NAMESPACE)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_counts(sender, **kwargs):
+    bump_namespace_version(RECIPE_COUNT_NAMESPACE)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_cookable_recipe(sender, instance, **kwargs):
+    schedule_cookable_update(instance.id)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_cookable_ingredients(sender, instance, **kwargs):
+    schedule_cookable_update(instance.recipe_id)
+
+
+@receiver(post_save, sender=FavoritedRecipe)
+@receiver(post_delete, sender=FavoritedRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_user_recipe_counts(sender, instance, **kwargs):
+    bump_namespace_version(
+        get_user_namespace(RECIPE_COUNT_NAMESPACE, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=FavoritedRecipe)
+@receiver(post_delete, sender=FavoritedRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_recipe_membership(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: invalidate_recipe_ids(sender, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_subscription_counts(sender, instance, **kwargs):
+    bump_namespace_version(
+        get_user_namespace(SUBSCRIPTION_COUNT_NAMESPACE, instance.user_id)
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_cart_export(sender, instance, **kwargs):
+    schedule_cart_update(instance.user_id)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_cart_exports(sender, instance, **kwargs):
+    schedule_recipe_cart_update(instance.recipe_id)
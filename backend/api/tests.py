@@ -0,0 +1,1020 @@
+import base64
+import io
+import json
+import os
+import re
+import tempfile
+import warnings
+from unittest import mock
+from array import array
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.test import TestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.models import (FavoritedRecipe, ImageStatus, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from recipes.recommendations import build_recommendations
+from recipes.search import update_search_documents
+from users.models import Subscription
+from .cache import (bump_namespace_version, get_cache_stats,
+                    get_namespace_version)
+from .cookable import CACHE_NAMESPACE as COOKABLE_NAMESPACE
+from .cookable import (CookableIndex, cookable_index, get_changes_key,
+                       publish_recipe_ingredients)
+from .images import (THUMBNAIL_FORMATS, THUMBNAIL_SIZES, THUMBNAILS_DIR,
+                     UPLOAD_SUFFIX, get_thumbnail_name)
+from .membership import get_membership_key, load_recipe_ids
+from .performance import registry
+from .serializers import RecipeRelationsResolver
+
+User = get_user_model()
+
+
+def create_recipes(author, count, tags, ingredients, start_id=1):
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            id=start_id + number,
+            author=author,
+            name=f"Рецепт {start_id + number}",
+            image="recipes/test.png",
+            text="Описание",
+            cooking_time=10 + number,
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[(number + shift) % len(ingredients)],
+                amount=shift + 1,
+            )
+            for shift in range(3)
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+class BaseAPITest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            id=1, username="user", email="user@example.com",
+            first_name="Иван", last_name="Иванов", password="pass",
+        )
+        cls.tags = [
+            Tag.objects.create(
+                id=number, name=f"Тэг {number}", slug=f"tag{number}",
+                color=f"#00000{number}",
+            )
+            for number in range(1, 4)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                id=number, name=f"Ингредиент {number}",
+                measurement_unit="г",
+            )
+            for number in range(1, 6)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get_client(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+
+class IngredientCacheTest(BaseAPITest):
+    def test_load_ingredients_invalidates_cache(self):
+        client = self.get_client()
+        url = "/api/ingredients/?name=ингредиент"
+        self.assertEqual(len(client.get(url).json()), 5)
+        self.assertEqual(len(client.get("/api/ingredients/").json()), 5)
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", encoding="utf-8"
+        ) as file:
+            file.write("Ингредиент 6,г\nИнгредиент 1,г\n")
+            file.flush()
+            call_command(
+                "load_ingredients", file.name, stdout=io.StringIO(),
+                stderr=io.StringIO(),
+            )
+        self.assertEqual(len(client.get(url).json()), 6)
+        self.assertEqual(len(client.get("/api/ingredients/").json()), 6)
+
+    def test_answered_without_queries(self):
+        client = self.get_client()
+        client.get("/api/ingredients/?name=ингр")
+        client.get("/api/ingredients/")
+        with self.assertNumQueries(0):
+            client.get("/api/ingredients/?name=ингредиент 2")
+            client.get("/api/ingredients/")
+
+    def test_autocomplete_is_not_cached(self):
+        client = self.get_client()
+        client.get("/api/ingredients/?name=ингр")
+        client.get("/api/ingredients/?name=ингредиент 1")
+        self.assertEqual(
+            get_cache_stats(["ingredients"]),
+            {"ingredients": {"hits": 0, "misses": 0}},
+        )
+        client.get("/api/ingredients/")
+        client.get("/api/ingredients/")
+        self.assertEqual(
+            get_cache_stats(["ingredients"]),
+            {"ingredients": {"hits": 1, "misses": 1}},
+        )
+
+
+class RecipePaginationTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        recipes = create_recipes(cls.user, 5, cls.tags, cls.ingredients)
+        recipes[1].text = "Суп суп суп"
+        recipes[1].save()
+        recipes[3].text = "Суп"
+        recipes[3].save()
+        update_search_documents(recipe.id for recipe in recipes)
+
+    def get_ids(self, url):
+        return [recipe["id"] for recipe in self.get_client().get(url).json()[
+            "results"
+        ]]
+
+    def test_cursor(self):
+        response = self.get_client().get(
+            "/api/recipes/?pagination=cursor&limit=2"
+        ).json()
+        self.assertNotIn("count", response)
+        self.assertEqual(
+            [recipe["id"] for recipe in response["results"]], [5, 4]
+        )
+
+    def test_cursor_keeps_search_rank(self):
+        ranked = self.get_ids("/api/recipes/?search=суп")
+        self.assertEqual(ranked, [2, 4])
+        response = self.get_client().get(
+            "/api/recipes/?search=суп&pagination=cursor"
+        ).json()
+        self.assertEqual(response["count"], 2)
+        self.assertEqual(
+            [recipe["id"] for recipe in response["results"]], ranked
+        )
+
+    def test_tags_modes(self):
+        cases = {
+            "tags=tag2&tags=tag3": [5, 3, 2],
+            "tags=tag2&tags=tag3&tags_mode=any": [5, 3, 2],
+            "tags=tag2&tags=tag3&tags_mode=all": [3],
+            "tags=tag1&tags=tag2&tags_mode=all": [5, 3, 2],
+            "tags=tag1&tags=tag1&tags_mode=all": [5, 4, 3, 2, 1],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                response = self.get_client().get(f"/api/recipes/?{query}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["count"], len(expected))
+                self.assertEqual(
+                    [recipe["id"] for recipe in response.json()["results"]],
+                    expected,
+                )
+
+    def get_counts(self, user=None):
+        client = self.get_client(user)
+        return [
+            client.get(url).json()["count"]
+            for url in (
+                "/api/recipes/",
+                "/api/recipes/?tags=tag3",
+                "/api/recipes/?is_favorited=1",
+            )
+        ]
+
+    def test_count_cache_invalidation(self):
+        self.assertEqual(self.get_counts(self.user), [5, 1, 0])
+        Recipe.objects.bulk_create([Recipe(
+            id=9, author=self.user, name="Без сигналов",
+            image="recipes/test.png", text="Описание", cooking_time=5,
+        )])
+        self.assertEqual(self.get_counts(self.user), [5, 1, 0])
+        recipe = create_recipes(
+            self.user, 1, self.tags, self.ingredients, start_id=10
+        )[0]
+        self.assertEqual(self.get_counts(self.user), [7, 1, 0])
+        recipe.tags.add(self.tags[2])
+        self.assertEqual(self.get_counts(self.user), [7, 2, 0])
+        with self.captureOnCommitCallbacks(execute=True):
+            FavoritedRecipe.objects.create(user=self.user, recipe=recipe)
+        self.assertEqual(self.get_counts(self.user), [7, 2, 1])
+        self.assertEqual(self.get_counts(), [7, 2, 7])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(self.get_counts(self.user), [6, 1, 0])
+
+
+class CookableIndexTest(TestCase):
+    def assertSameIndex(self, index, rows):
+        expected = CookableIndex()
+        expected.build(rows)
+        self.assertEqual(index.postings, expected.postings)
+        for query in ([1], [2, 3], [1, 2, 3, 4]):
+            self.assertEqual(index.rank(query), expected.rank(query))
+
+    def test_apply(self):
+        rows = {(1, 1), (2, 1), (2, 2), (3, 2), (3, 3)}
+        index = CookableIndex()
+        index.build(sorted(rows))
+        index.apply({4: [1, 4], 2: [1], 3: []})
+        self.assertSameIndex(
+            index, [(1, 1), (2, 1), (1, 2), (1, 4), (4, 4)]
+        )
+        self.assertEqual(index.totals[3], 0)
+        index.apply({2: [2, 3], 4: []})
+        self.assertSameIndex(index, [(1, 1), (2, 1), (2, 2), (3, 2)])
+
+
+class CookableTest(BaseAPITest):
+    url = "/api/recipes/cookable/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_recipes(cls.user, 4, cls.tags, cls.ingredients)
+
+    def setUp(self):
+        super().setUp()
+        cookable_index.version = None
+
+    def get_ranking(self, query):
+        response = self.get_client().get(f"{self.url}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [
+            (
+                recipe["id"], recipe["coverage"],
+                recipe["matched_ingredients"],
+                recipe["missing_ingredients"],
+            )
+            for recipe in response.json()["results"]
+        ]
+
+    def test_ranking(self):
+        self.assertEqual(self.get_ranking("ingredients=2,3,4"), [
+            (2, 1.0, 3, 0), (3, 0.6667, 2, 1),
+            (1, 0.6667, 2, 1), (4, 0.3333, 1, 2),
+        ])
+        self.assertEqual(
+            self.get_ranking("ingredients=2&ingredients=3,4&min_coverage=1"),
+            [(2, 1.0, 3, 0)],
+        )
+
+    def test_invalid_params(self):
+        for query, field in (
+            ("", "ingredients"),
+            ("ingredients=1,x", "ingredients"),
+            ("ingredients=" + ",".join(map(str, range(101))), "ingredients"),
+            ("ingredients=1&min_coverage=x", "min_coverage"),
+            ("ingredients=1&min_coverage=1.5", "min_coverage"),
+            ("ingredients=1&min_coverage=-1", "min_coverage"),
+        ):
+            with self.subTest(query=query):
+                response = self.get_client().get(f"{self.url}?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json())
+
+    def test_changes_are_applied_incrementally(self):
+        self.get_ranking("ingredients=1")
+        recipe = Recipe.objects.get(id=1)
+        with mock.patch.object(cookable_index, "load") as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient_id=4, amount=1
+                )
+            self.assertEqual(
+                self.get_ranking("ingredients=1,2,3,4")[0], (1, 1.0, 4, 0)
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe.delete()
+            self.assertNotIn(
+                1, [item[0] for item in self.get_ranking("ingredients=1")]
+            )
+        load.assert_not_called()
+
+    def test_concurrent_publishers_use_own_versions(self):
+        version = get_namespace_version(COOKABLE_NAMESPACE)
+
+        def bump_with_concurrent_publisher(namespace):
+            bumped = bump_namespace_version(namespace)
+            bump_namespace_version(namespace)
+            return bumped
+
+        with mock.patch(
+            "api.cookable.bump_namespace_version",
+            bump_with_concurrent_publisher,
+        ):
+            publish_recipe_ingredients({1})
+        self.assertEqual(
+            cache.get(get_changes_key(version + 1)), {1: [1, 2, 3]}
+        )
+        self.assertIsNone(cache.get(get_changes_key(version + 2)))
+
+
+class RecommendedTest(BaseAPITest):
+    url = "/api/recipes/recommended/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.authors = [
+            User.objects.create(
+                id=10 + number, username=f"author{number}",
+                email=f"author{number}@example.com",
+            )
+            for number in range(2)
+        ]
+        cls.recipes = [
+            create_recipes(
+                cls.authors[number % 2], 1, cls.tags, cls.ingredients,
+                start_id=number + 1,
+            )[0]
+            for number in range(4)
+        ]
+
+    def get_ids(self):
+        response = self.get_client(self.user).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.json()["results"]]
+
+    def test_precomputed_feed(self):
+        for user, recipes in (
+            (self.user, self.recipes[:2]),
+            (self.authors[0], self.recipes[:3]),
+            (self.authors[1], self.recipes[2:]),
+        ):
+            for recipe in recipes:
+                FavoritedRecipe.objects.create(user=user, recipe=recipe)
+        Subscription.objects.create(user=self.user, author=self.authors[1])
+        build_recommendations(workers=1)
+        self.assertEqual(self.get_ids(), [3, 4])
+
+    def test_fallback_excludes_saved_and_own_recipes(self):
+        own = create_recipes(
+            self.user, 1, self.tags, self.ingredients, start_id=5
+        )[0]
+        FavoritedRecipe.objects.create(user=self.user, recipe=self.recipes[0])
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[1])
+        FavoritedRecipe.objects.create(
+            user=self.authors[0], recipe=self.recipes[2]
+        )
+        FavoritedRecipe.objects.create(user=self.authors[0], recipe=own)
+        self.assertEqual(self.get_ids(), [3, 4])
+
+
+class RecipeMembershipTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = create_recipes(
+            cls.user, 1, cls.tags, cls.ingredients
+        )[0]
+
+    def get_flags(self, client):
+        data = client.get(f"/api/recipes/{self.recipe.id}/").json()
+        return data["is_favorited"], data["is_in_shopping_cart"]
+
+    def test_flags_follow_changes(self):
+        client = self.get_client(self.user)
+        self.assertEqual(self.get_flags(client), (False, False))
+        for url, flags in (
+            ("favorite", (True, False)),
+            ("shopping_cart", (True, True)),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(f"/api/recipes/{self.recipe.id}/{url}/")
+            self.assertEqual(self.get_flags(client), flags)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f"/api/recipes/{self.recipe.id}/favorite/")
+        self.assertEqual(self.get_flags(client), (False, True))
+
+    def test_stale_load_is_not_served(self):
+        stale_key = get_membership_key(FavoritedRecipe, self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            FavoritedRecipe.objects.create(user=self.user, recipe=self.recipe)
+        cache.set(stale_key, array("q"))
+        self.assertEqual(
+            load_recipe_ids(FavoritedRecipe, self.user.id), {self.recipe.id}
+        )
+
+
+class ShoppingCartExportTest(BaseAPITest):
+    url = "/api/recipes/download_shopping_cart/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in create_recipes(cls.user, 2, cls.tags, cls.ingredients):
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_export_is_streamed(self):
+        client = self.get_client(self.user)
+        for _ in range(2):
+            response = client.get(self.url, HTTP_ACCEPT="text/plain")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            content = b"".join(response.streaming_content).decode()
+            self.assertEqual(content, (
+                "Список продуктов для покупки\n\n1. Ингредиент 1 - 1 г\n"
+                "2. Ингредиент 2 - 3 г\n3. Ингредиент 3 - 5 г\n"
+                "4. Ингредиент 4 - 3 г\n"
+            ))
+            self.assertEqual(
+                response["Content-Length"], str(len(content.encode()))
+            )
+            self.assertEqual(
+                response["Content-Disposition"],
+                'attachment; filename="shopping_cart.txt"',
+            )
+        response = client.get(
+            self.url, HTTP_ACCEPT="text/plain",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def get_etag(self):
+        response = self.get_client(self.user).get(
+            self.url, HTTP_ACCEPT="text/plain"
+        )
+        return response["ETag"]
+
+    def test_etag_changes_on_every_cart_change(self):
+        client = self.get_client(self.user)
+        recipe = Recipe.objects.get(id=1)
+        etags = [self.get_etag()]
+        changes = (
+            lambda: client.delete(f"/api/recipes/{recipe.id}/shopping_cart/"),
+            lambda: client.post(f"/api/recipes/{recipe.id}/shopping_cart/"),
+            lambda: RecipeIngredient.objects.filter(recipe=recipe)
+            .first().save(),
+            lambda: RecipeIngredient.objects.filter(recipe=recipe)
+            .first().delete(),
+            lambda: client.patch(
+                f"/api/recipes/{recipe.id}/",
+                {"tags": [1], "ingredients": [{"id": 5, "amount": 7}]},
+                format="json",
+            ),
+            lambda: recipe.delete(),
+        )
+        for change in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            etags.append(self.get_etag())
+        self.assertEqual(len(set(etags)), len(etags))
+        response = self.get_client(self.user).get(
+            self.url, HTTP_ACCEPT="text/plain", HTTP_IF_NONE_MATCH=etags[0]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+
+    def test_version_is_bumped_on_commit(self):
+        etag = self.get_etag()
+        with self.captureOnCommitCallbacks() as callbacks:
+            ShoppingCart.objects.filter(user=self.user).delete()
+            self.assertEqual(self.get_etag(), etag)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.get_etag(), etag)
+
+    def create_cart(self, username, ingredients):
+        user = User.objects.create(
+            username=username, email=f"{username}@example.com"
+        )
+        recipe = Recipe.objects.create(
+            author=self.user, name=f"Рецепт {username}", text="Описание",
+            image="recipes/test.png", cooking_time=10,
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=2)
+            for ingredient in ingredients
+        )
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        return user
+
+    def test_units_stay_separate(self):
+        user = self.create_cart("salt", [
+            Ingredient.objects.create(name="соль", measurement_unit="г"),
+            Ingredient.objects.create(name="соль", measurement_unit="ч. л."),
+        ])
+        response = self.get_client(user).get(
+            self.url, HTTP_ACCEPT="text/plain"
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content).decode(),
+            "Список продуктов для покупки\n\n1. Соль - 2 г\n"
+            "2. Соль - 2 ч. л.\n",
+        )
+
+    def test_long_cart_is_multi_page(self):
+        user = self.create_cart("long", [
+            Ingredient.objects.create(
+                name=f"Продукт {number:03}", measurement_unit="г"
+            )
+            for number in range(100)
+        ])
+        client = self.get_client(user)
+        with mock.patch("api.shopping_list.EXPORT_CACHE_MAX_SIZE", 0):
+            for _ in range(2):
+                response = client.get(self.url, HTTP_ACCEPT="application/pdf")
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIsInstance(response.file_to_stream, io.BytesIO)
+                content = b"".join(response.streaming_content)
+                self.assertEqual(
+                    response["Content-Length"], str(len(content))
+                )
+                self.assertTrue(content.startswith(b"%PDF"))
+                self.assertEqual(
+                    len(re.findall(rb"/Type /Page\b(?!s)", content)), 4
+                )
+
+    def test_errors_are_json(self):
+        for accept in ("application/pdf", "text/csv", "text/plain", "*/*"):
+            with self.subTest(accept=accept):
+                response = self.get_client().get(
+                    self.url, HTTP_ACCEPT=accept
+                )
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertIn("detail", response.json())
+        response = self.get_client().get(f"{self.url}?format=pdf")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("detail", response.json())
+        response = self.get_client(self.user).get(
+            self.url, HTTP_ACCEPT="image/png"
+        )
+        self.assertEqual(response.status_code, 406)
+        self.assertIn("detail", response.json())
+
+
+class RecipeUpdateTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = create_recipes(cls.user, 1, cls.tags, cls.ingredients)[0]
+
+    def update(self, ingredients):
+        return self.get_client(self.user).patch(
+            f"/api/recipes/{self.recipe.id}/",
+            {"tags": [1], "ingredients": ingredients},
+            format="json",
+        )
+
+    def get_rows(self):
+        return {
+            ingredient_id: (row_id, amount)
+            for row_id, ingredient_id, amount in RecipeIngredient.objects
+            .filter(recipe=self.recipe)
+            .values_list("id", "ingredient_id", "amount")
+        }
+
+    def test_ingredients_diff(self):
+        before = self.get_rows()
+        response = self.update([
+            {"id": 1, "amount": 1},
+            {"id": "2", "amount": "5"},
+            {"id": 4, "amount": 4},
+        ])
+        self.assertEqual(response.status_code, 200)
+        after = self.get_rows()
+        self.assertEqual(
+            {key: amount for key, (_, amount) in after.items()},
+            {1: 1, 2: 5, 4: 4},
+        )
+        self.assertEqual(after[1], before[1])
+        self.assertEqual(after[2][0], before[2][0])
+        self.assertEqual(
+            [item["id"] for item in response.data["ingredients"]], [1, 2, 4]
+        )
+
+    def test_invalid_ingredients(self):
+        before = self.get_rows()
+        response = self.update([
+            {"id": 1, "amount": 1}, {"id": "1", "amount": 2}
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": [
+            "Ошибка! Нельзя добавлять несколько одинаковых ингредиентов!"
+        ]})
+        for ingredient_id in ("abc", None, 99):
+            with self.subTest(ingredient_id=ingredient_id):
+                response = self.update([{"id": ingredient_id, "amount": 1}])
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.get_rows(), before)
+
+
+def encode_test_image(size):
+    output = io.BytesIO()
+    Image.new("RGB", size, "red").save(output, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        output.getvalue()
+    ).decode()
+
+
+class RecipeImageTest(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media_root.name, RECIPE_IMAGE_WORKERS=0
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch("api.images.close_old_connections")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = self.get_client(self.user)
+        self.placeholder = (
+            "http://testserver" + settings.RECIPE_IMAGE_PLACEHOLDER
+        )
+
+    def create_recipe(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post("/api/recipes/", {
+                "tags": [1],
+                "ingredients": [{"id": 1, "amount": 10}],
+                "name": "Суп",
+                "image": encode_test_image((1200, 800)),
+                "text": "текст",
+                "cooking_time": 5,
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+        return Recipe.objects.get(id=response.data["id"]), callbacks
+
+    def run_callbacks(self, callbacks):
+        for callback in callbacks:
+            callback()
+
+    def get_listed_recipe(self):
+        return self.client.get("/api/recipes/").data["results"][0]
+
+    def assert_placeholder(self, data):
+        self.assertEqual(data["image"], self.placeholder)
+        self.assertEqual(data["thumbnails"], {
+            str(size): {
+                extension: self.placeholder
+                for extension, _ in THUMBNAIL_FORMATS
+            }
+            for size in THUMBNAIL_SIZES
+        })
+
+    def test_placeholder_while_pending(self):
+        recipe, _ = self.create_recipe()
+        self.assertEqual(recipe.image_status, ImageStatus.PENDING)
+        self.assertTrue(default_storage.exists(recipe.image.name))
+        self.assert_placeholder(self.get_listed_recipe())
+        self.assert_placeholder(
+            self.client.get(f"/api/recipes/{recipe.id}/").data
+        )
+
+    def test_thumbnails_when_ready(self):
+        recipe, callbacks = self.create_recipe()
+        upload_name = recipe.image.name
+        self.run_callbacks(callbacks)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, ImageStatus.READY)
+        self.assertEqual(recipe.thumbnails_for, recipe.image.name)
+        self.assertEqual(
+            recipe.image.name,
+            upload_name.replace(f"{UPLOAD_SUFFIX}.png", ".jpg"),
+        )
+        self.assertFalse(default_storage.exists(upload_name))
+        media_url = "http://testserver" + settings.MEDIA_URL
+        data = self.get_listed_recipe()
+        self.assertEqual(data["image"], media_url + recipe.image.name)
+        for size in THUMBNAIL_SIZES:
+            for extension, _ in THUMBNAIL_FORMATS:
+                name = get_thumbnail_name(recipe.image.name, size, extension)
+                self.assertEqual(
+                    data["thumbnails"][str(size)][extension], media_url + name
+                )
+                with default_storage.open(name) as file:
+                    self.assertEqual(max(Image.open(file).size), size)
+
+    def test_failed_processing(self):
+        recipe, callbacks = self.create_recipe()
+        with mock.patch("api.images.prepare_image", side_effect=OSError):
+            with self.assertLogs("api.images", "ERROR"):
+                self.run_callbacks(callbacks)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, ImageStatus.FAILED)
+        self.assert_placeholder(self.get_listed_recipe())
+
+    def test_newer_upload_wins(self):
+        recipe, callbacks = self.create_recipe()
+        upload_name = recipe.image.name
+        Recipe.objects.filter(id=recipe.id).update(
+            image=f"recipes/newer{UPLOAD_SUFFIX}.png"
+        )
+        self.run_callbacks(callbacks)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_status, ImageStatus.PENDING)
+        self.assertFalse(default_storage.exists(upload_name))
+        self.assertEqual(default_storage.listdir("recipes")[1], [])
+        self.assertEqual(default_storage.listdir(THUMBNAILS_DIR), ([], []))
+
+
+class RecipeQueriesTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        authors = [
+            User.objects.create_user(
+                id=10 + number, username=f"author{number}",
+                email=f"author{number}@example.com", password="pass",
+            )
+            for number in range(5)
+        ]
+        for number, author in enumerate(authors):
+            create_recipes(
+                author, 24, cls.tags, cls.ingredients,
+                start_id=1 + number * 24,
+            )
+        for recipe in Recipe.objects.all()[:10]:
+            FavoritedRecipe.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def assertRequestQueries(self, user, url, number):
+        cache.clear()
+        with self.assertNumQueries(number):
+            response = self.get_client(user).get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_anonymous(self):
+        for limit in (6, 100):
+            with self.subTest(limit=limit):
+                response = self.assertRequestQueries(
+                    None, f"/api/recipes/?limit={limit}", 5
+                )
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_list_authenticated(self):
+        for limit in (6, 100):
+            with self.subTest(limit=limit):
+                response = self.assertRequestQueries(
+                    self.user, f"/api/recipes/?limit={limit}", 7
+                )
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_retrieve_anonymous(self):
+        self.assertRequestQueries(None, "/api/recipes/1/", 4)
+
+    def test_retrieve_authenticated(self):
+        self.assertRequestQueries(self.user, "/api/recipes/1/", 6)
+
+    def test_resolver_loads_missing_authors(self):
+        first, second = Recipe.objects.filter(id__in=(1, 25)).order_by("id")
+        resolver = RecipeRelationsResolver(mock.Mock(user=self.user), [first])
+        with mock.patch.object(
+            resolver, "load_authors", wraps=resolver.load_authors
+        ) as load_authors:
+            with self.assertNumQueries(1):
+                resolver.get_author(first)
+            with self.assertNumQueries(1):
+                author = resolver.get_author(second)
+            with self.assertNumQueries(0):
+                resolver.get_author(first)
+                resolver.get_author(second)
+        self.assertEqual(author["id"], second.author_id)
+        self.assertEqual(load_authors.call_args_list, [
+            mock.call({first.author_id}), mock.call({second.author_id})
+        ])
+
+
+class SubscriptionQueriesTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.authors = User.objects.bulk_create(
+            User(
+                id=100 + number, username=f"author{number}",
+                email=f"author{number}@example.com",
+            )
+            for number in range(101)
+        )
+        for number, author in enumerate(cls.authors):
+            create_recipes(
+                author, 3, cls.tags, cls.ingredients,
+                start_id=1 + number * 3,
+            )
+
+    def follow(self, count):
+        Subscription.objects.filter(user=self.user).delete()
+        Subscription.objects.bulk_create(
+            Subscription(user=self.user, author=author)
+            for author in self.authors[:count]
+        )
+        cache.clear()
+
+    def test_subscriptions(self):
+        for count in (1, 10, 100):
+            with self.subTest(count=count):
+                self.follow(count)
+                with self.assertNumQueries(3):
+                    response = self.get_client(self.user).get(
+                        "/api/users/subscriptions/?limit=100&recipes_limit=2"
+                    )
+                self.assertEqual(len(response.data["results"]), count)
+                self.assertEqual(
+                    len(response.data["results"][0]["recipes"]), 2
+                )
+
+    def test_subscriptions_order(self):
+        self.follow(100)
+        client = self.get_client(self.user)
+        expected = [author.id for author in reversed(self.authors[:100])]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", UnorderedObjectListWarning)
+            response = client.get(
+                "/api/users/subscriptions/?limit=40&page=2"
+            )
+        self.assertEqual(
+            [user["id"] for user in response.data["results"]],
+            expected[40:80],
+        )
+        ids = []
+        url = "/api/users/subscriptions/?pagination=cursor&limit=40"
+        while url:
+            response = client.get(url)
+            ids.extend(user["id"] for user in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(ids, expected)
+
+    def test_subscribe(self):
+        author = self.authors[-1]
+        for count in (1, 10, 100):
+            with self.subTest(count=count):
+                self.follow(count)
+                with self.assertNumQueries(5):
+                    response = self.get_client(self.user).post(
+                        f"/api/users/{author.id}/subscribe/?recipes_limit=2"
+                    )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(len(response.data["recipes"]), 2)
+
+
+@modify_settings(
+    MIDDLEWARE={"prepend": "api.performance.PerformanceMiddleware"}
+)
+class PerformanceMetricsTest(BaseAPITest):
+    url = "/api/performance/stats/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(
+            id=2, username="admin", email="admin@example.com",
+            password="pass", is_staff=True,
+        )
+        create_recipes(cls.user, 3, cls.tags, cls.ingredients)
+
+    def setUp(self):
+        super().setUp()
+        registry.actions.clear()
+
+    def test_server_timing_disabled_by_default(self):
+        response = self.get_client(self.admin).get("/api/tags/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=True)
+    def test_server_timing_only_for_staff(self):
+        for user in (None, self.user):
+            response = self.get_client(user).get("/api/tags/")
+            self.assertNotIn("Server-Timing", response)
+        response = self.get_client(self.admin).get("/api/tags/")
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, '
+            r"render;dur=[\d.]+, total;dur=[\d.]+$",
+        )
+
+    def test_stats_require_admin(self):
+        self.assertEqual(self.get_client().get(self.url).status_code, 401)
+        self.assertEqual(
+            self.get_client(self.user).get(self.url).status_code, 403
+        )
+
+    def test_stats(self):
+        client = self.get_client(self.admin)
+        sql_count = 0
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                client.get("/api/recipes/")
+            sql_count += len(queries)
+        stats = client.get(self.url).json()["actions"]["RecipeViewSet.list"]
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["mean_sql_count"], sql_count / 2)
+        self.assertGreater(stats["mean_serialize_ms"], 0)
+        response = client.get(self.url, {"format": "prometheus"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        lines = response.content.decode().splitlines()
+        label = 'action="RecipeViewSet.list"'
+        self.assertIn(
+            f'foodgram_request_duration_seconds_bucket{{{label},le="+Inf"}} 2',
+            lines,
+        )
+        self.assertIn(
+            f"foodgram_request_duration_seconds_count{{{label}}} 2", lines
+        )
+        self.assertIn(
+            f"foodgram_request_sql_queries_total{{{label}}} {sql_count}",
+            lines,
+        )
+
+
+def create_golden_data(user, tags, ingredients):
+    authors = [
+        User.objects.create_user(
+            id=200 + number, username=f"cook{number}",
+            email=f"cook{number}@example.com", first_name=f"Имя {number}",
+            last_name=f"Фамилия {number}", password="pass",
+        )
+        for number in range(3)
+    ]
+    recipes = []
+    for number, author in enumerate(authors):
+        recipes.extend(create_recipes(
+            author, 4, tags, ingredients, start_id=1 + number * 4
+        ))
+    for recipe in recipes[::3]:
+        FavoritedRecipe.objects.create(user=user, recipe=recipe)
+    for recipe in recipes[1::4]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    for author in authors[:2]:
+        Subscription.objects.create(user=user, author=author)
+    Subscription.objects.create(user=authors[0], author=authors[1])
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+GOLDEN_REQUESTS = {
+    "recipe_list": (True, "/api/recipes/?limit=20"),
+    "recipe_list_anonymous": (False, "/api/recipes/?limit=20"),
+    "recipe_list_filtered": (
+        True, "/api/recipes/?is_favorited=1&tags=tag2&limit=20"
+    ),
+    "recipe_detail": (True, "/api/recipes/2/"),
+    "recipe_detail_anonymous": (False, "/api/recipes/5/"),
+    "user_detail": (True, "/api/users/200/"),
+    "subscriptions": (True, "/api/users/subscriptions/?recipes_limit=2"),
+    "subscriptions_all_recipes": (True, "/api/users/subscriptions/"),
+}
+ADDED_FIELDS = ("thumbnails",)
+
+
+def strip_added_fields(data):
+    if isinstance(data, list):
+        return [strip_added_fields(item) for item in data]
+    if isinstance(data, dict):
+        return {
+            key: strip_added_fields(value)
+            for key, value in data.items()
+            if key not in ADDED_FIELDS
+        }
+    return data
+
+
+class GoldenPayloadTest(BaseAPITest):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_golden_data(cls.user, cls.tags, cls.ingredients)
+
+    def test_payloads(self):
+        for name, (authenticated, url) in GOLDEN_REQUESTS.items():
+            with self.subTest(name=name):
+                with open(
+                    os.path.join(GOLDEN_DIR, f"{name}.json"), encoding="utf-8"
+                ) as file:
+                    expected = json.load(file)
+                client = self.get_client(self.user if authenticated else None)
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    strip_added_fields(response.json()), expected
+                )
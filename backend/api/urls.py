@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UsersViewSet
+from .views import (CacheStatsView, IngredientViewSet, PerformanceStatsView,
+                    RecipeViewSet, TagViewSet, UsersViewSet)
 
 app_name = "api"
 
@@ -13,6 +14,12 @@ router.register("tags", TagViewSet, basename="tags")
 router.register("users", UsersViewSet, basename="users")
 
 urlpatterns = [
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats"),
+    path(
+        "performance/stats/",
+        PerformanceStatsView.as_view(),
+        name="performance-stats",
+    ),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
@@ -1,54 +1,73 @@
+import os
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Exists, OuterRef
-from django.http import HttpResponse
+from django.db.models import Exists, F, OuterRef, Prefetch, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
 from recipes.models import (FavoritedRecipe, Ingredient, Recipe,
                             RecipeIngredient, ShoppingCart, Tag)
 from users.models import Subscription
-from .filters import IngredientSearchFilter, RecipesFilter
-from .pagination import CustomPagination
+from .cache import (RECIPE_COUNT_NAMESPACE, SUBSCRIPTION_COUNT_NAMESPACE,
+                    CachedReadOnlyMixin, get_cache_stats,
+                    get_namespace_version, get_user_namespace)
+from .cookable import cookable_index
+from .filters import (TAGS_ALL, IngredientSearchFilter, RecipeSearchFilter,
+                      RecipesFilter)
+from .pagination import CustomPagination, RankedPagination
 from .permissions import IsOwnerOrReadOnly
+from .performance import registry
+from .renderers import (CSVRenderer, FastJSONRenderer, PDFRenderer,
+                        PlainTextRenderer, PrometheusRenderer)
 from .serializers import (CustomUserSerializer,
                           ListRetrieveIngredientSerializer, RecipeSerializer,
                           ShortRecipeSerializer, ShortUserSerializer,
                           SubscriptionSerializer, TagSerializer)
+from .shopping_list import get_cart_version, get_shopping_cart_export
 
 User = get_user_model()
 
+MAX_COOKABLE_INGREDIENTS = 100
+
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = "tags"
     permission_classes = (AllowAny,)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = "ingredients"
+    uncached_params = ("name",)
     permission_classes = (AllowAny,)
     queryset = Ingredient.objects.all()
     serializer_class = ListRetrieveIngredientSerializer
     filter_backends = (IngredientSearchFilter,)
-    search_fields = ("^name",)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     serializer_class = RecipeSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, RecipeSearchFilter]
     filterset_class = RecipesFilter
     pagination_class = CustomPagination
 
     def get_permissions(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'cookable'):
             permission_classes = (AllowAny,)
         elif self.action in ('update', 'destroy', 'partial_update'):
             permission_classes = (IsOwnerOrReadOnly,)
@@ -57,21 +76,87 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = (
-            Recipe.objects.select_related("author")
-            .prefetch_related("tags", "ingredients")
+        return Recipe.objects.prefetch_related(
+            "tags",
+            Prefetch(
+                "recipe_ingredient_recipe",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient"
+                ),
+            ),
+        )
+
+    def get_count_filters(self):
+        params = self.request.query_params
+        if RecipeSearchFilter().get_query(self.request):
+            return None
+        filters = []
+        tags = sorted(set(params.getlist("tags")))
+        if tags:
+            filters.append("tags=" + ",".join(tags))
+            if params.get("tags_mode") == TAGS_ALL:
+                filters.append(f"tags_mode={TAGS_ALL}")
+        if params.get("author"):
+            filters.append(f'author={params["author"]}')
+        namespace = (
+            f"{RECIPE_COUNT_NAMESPACE}:"
+            f"{get_namespace_version(RECIPE_COUNT_NAMESPACE)}"
         )
         user = self.request.user
         if user.is_authenticated:
-            is_favorited = FavoritedRecipe.objects.filter(
-                user=user, recipe=OuterRef("id"))
-            is_in_shopping_cart = ShoppingCart.objects.filter(
-                user=user, recipe=OuterRef("id"))
-            queryset = queryset.annotate(
-                is_favorited=Exists(is_favorited),
-                is_in_shopping_cart=Exists(is_in_shopping_cart)
-            )
-        return queryset
+            user_filters = [
+                name for name in ("is_favorited", "is_in_shopping_cart")
+                if params.get(name, "").lower() in ("1", "true")
+            ]
+            if user_filters:
+                user_namespace = get_user_namespace(
+                    RECIPE_COUNT_NAMESPACE, user.id
+                )
+                filters.extend(user_filters)
+                filters.append(
+                    f"{user_namespace}:"
+                    f"{get_namespace_version(user_namespace)}"
+                )
+        return namespace, filters
+
+    def handle_exception(self, exc):
+        if self.action == "download_shopping_cart":
+            self.request.accepted_renderer = FastJSONRenderer()
+            self.request.accepted_media_type = FastJSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get_cookable_params(self):
+        params = self.request.query_params
+        ingredient_ids = set()
+        for value in params.getlist("ingredients"):
+            for item in value.split(","):
+                if not item.strip():
+                    continue
+                try:
+                    ingredient_ids.add(int(item))
+                except ValueError:
+                    raise ValidationError({
+                        "ingredients": f"Ошибка! Некорректный id: {item}"
+                    })
+        if not ingredient_ids:
+            raise ValidationError({
+                "ingredients": "Ошибка! Укажите хотя бы один ингредиент!"
+            })
+        if len(ingredient_ids) > MAX_COOKABLE_INGREDIENTS:
+            raise ValidationError({
+                "ingredients":
+                    f"Ошибка! Можно указать не больше "
+                    f"{MAX_COOKABLE_INGREDIENTS} ингредиентов!"
+            })
+        try:
+            min_coverage = float(params.get("min_coverage", 0))
+        except ValueError:
+            min_coverage = -1
+        if not 0 <= min_coverage <= 1:
+            raise ValidationError({
+                "min_coverage": "Ошибка! Укажите число от 0 до 1!"
+            })
+        return ingredient_ids, min_coverage
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -121,47 +206,83 @@ class RecipeViewSet(viewsets.ModelViewSet):
         elif request.method == "DELETE":
             return self.delete_recipe_object(ShoppingCart, request.user, pk)
 
+    @action(methods=["get"], detail=False)
+    def cookable(self, request):
+        ranking = cookable_index.search(*self.get_cookable_params())
+        paginator = RankedPagination()
+        page = paginator.paginate_queryset(ranking, request, view=self)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, _, recipe_id, _ in page]
+        )
+        page = [item for item in page if item[2] in recipes]
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for _, _, recipe_id, _ in page], many=True
+        )
+        data = serializer.data
+        for item, (coverage, matched, _, total) in zip(data, page):
+            item["coverage"] = round(coverage, 4)
+            item["matched_ingredients"] = matched
+            item["missing_ingredients"] = total - matched
+        return paginator.get_paginated_response(data)
+
     @action(
         methods=["get"], detail=False, permission_classes=[IsAuthenticated]
     )
-    def download_shopping_cart(self, request):
-        ingredients_list = {}
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values_list(
-            "ingredient__name", "ingredient__measurement_unit", "amount"
+    def recommended(self, request):
+        paginator = RankedPagination()
+        page = paginator.paginate_queryset(
+            self.get_queryset()
+            .filter(recommendations__user=request.user)
+            .order_by("-recommendations__score", "-id"),
+            request,
+            view=self,
         )
-        for ingredient in ingredients:
-            ingredient_name = ingredient[0]
-            if ingredient_name not in ingredients_list:
-                ingredients_list[ingredient_name] = {
-                    "measurement_unit": ingredient[1],
-                    "amount": ingredient[2],
-                }
-            else:
-                ingredients_list[ingredient_name]["amount"] += ingredient[2]
-        pdfmetrics.registerFont(TTFont("Verdana", "Verdana.ttf", "UTF-8"))
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = (
-            "attachment; " 'filename="shopping_cart.pdf"'
-        )
-        page = canvas.Canvas(response)
-        page.setFont("Verdana", size=30)
-        page.drawString(30, 790, "Список продуктов для покупки")
-        page.setFont("Verdana", size=14)
-        height = 750
-        for item, (name, data) in enumerate(ingredients_list.items(), 1):
-            page.drawString(
-                30,
-                height,
-                (
-                    f'{item}. {name.capitalize()} - {data["amount"]} '
-                    f'{data["measurement_unit"]}'
-                ),
+        if not paginator.page.paginator.count:
+            saved = [
+                model.objects.filter(user=request.user, recipe=OuterRef("id"))
+                for model in (FavoritedRecipe, ShoppingCart)
+            ]
+            page = paginator.paginate_queryset(
+                self.get_queryset()
+                .exclude(author=request.user)
+                .filter(~Exists(saved[0]), ~Exists(saved[1]))
+                .order_by("-favorites_count", "-id"),
+                request,
+                view=self,
             )
-            height -= 25
-        page.showPage()
-        page.save()
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        methods=["get"],
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            PDFRenderer, CSVRenderer, PlainTextRenderer, FastJSONRenderer
+        ],
+    )
+    def download_shopping_cart(self, request):
+        renderer = request.accepted_renderer
+        version = get_cart_version(request.user.id)
+        etag = f'"{request.user.id}-{version}-{renderer.format}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            export = get_shopping_cart_export(request.user, renderer, version)
+            size = export.seek(0, os.SEEK_END)
+            export.seek(0)
+            response = FileResponse(
+                export,
+                as_attachment=True,
+                filename=f"shopping_cart.{renderer.format}",
+                content_type=content_type,
+            )
+            response["Content-Length"] = size
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Accept",))
+        patch_cache_control(response, private=True, no_cache=True)
         return response
 
 
@@ -175,10 +296,63 @@ class UsersViewSet(UserViewSet):
             is_subscribed = user.follower.filter(author=OuterRef('id'))
             queryset = queryset.annotate(
                 is_subscribed=Exists(is_subscribed),
-                recipes_count=Count("recipes")
+                recipes_count=Coalesce(F("statistics__recipes_count"), 0),
             )
         return queryset
 
+    def get_recipes_limit(self):
+        try:
+            return max(int(self.request.query_params["recipes_limit"]), 0)
+        except (KeyError, ValueError):
+            return None
+
+    def get_subscription_context(self, authors):
+        recipes_limit = self.get_recipes_limit()
+        author_ids = [author.id for author in authors]
+        ranked = (
+            Recipe.objects.filter(author_id__in=author_ids)
+            .only(
+                "id", "author_id", "name", "image", "image_status",
+                "thumbnails_for", "cooking_time",
+            )
+            .annotate(
+                recipe_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("author_id")],
+                    order_by=F("id").desc(),
+                )
+            )
+            .order_by()
+        )
+        sql, params = ranked.query.sql_with_params()
+        condition = ""
+        if recipes_limit is not None:
+            condition = " WHERE recipe_rank <= %s"
+            params = (*params, max(recipes_limit, 1))
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.raw(
+            f"SELECT * FROM ({sql}) ranked{condition} ORDER BY id DESC",
+            params,
+        ):
+            recipes[recipe.author_id].append(recipe)
+        if recipes_limit is not None:
+            for author_id in recipes:
+                recipes[author_id] = recipes[author_id][:recipes_limit]
+        return {"request": self.request, "recipes": recipes}
+
+    def get_count_filters(self):
+        if self.action != "subscriptions":
+            return None
+        user_id = self.request.user.id
+        user_namespace = get_user_namespace(
+            SUBSCRIPTION_COUNT_NAMESPACE, user_id
+        )
+        return (
+            f"{SUBSCRIPTION_COUNT_NAMESPACE}:"
+            f"{get_namespace_version(user_namespace)}",
+            [f"user={user_id}"],
+        )
+
     def get_serializer_class(self):
         if self.action in ("create",):
             return ShortUserSerializer
@@ -209,7 +383,7 @@ class UsersViewSet(UserViewSet):
             queryset = self.get_queryset()
             queryset = queryset.filter(id=id).get()
             serializer = SubscriptionSerializer(
-                queryset, context={"request": request}
+                queryset, context=self.get_subscription_context([queryset])
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         elif request.method == "DELETE":
@@ -235,9 +409,33 @@ class UsersViewSet(UserViewSet):
     def subscriptions(self, request):
         user = request.user
         queryset = self.get_queryset()
-        queryset = queryset.filter(following__user=user)
+        queryset = queryset.filter(following__user=user).order_by("-id")
         pagination = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(
-            pagination, many=True, context={"request": request}
+            pagination,
+            many=True,
+            context=self.get_subscription_context(pagination),
         )
         return self.get_paginated_response(serializer.data)
+
+
+class CacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(get_cache_stats((
+            TagViewSet.cache_namespace,
+            IngredientViewSet.cache_namespace,
+        )))
+
+
+class PerformanceStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (
+        *api_settings.DEFAULT_RENDERER_CLASSES, PrometheusRenderer
+    )
+
+    def get(self, request):
+        if request.accepted_renderer.format == PrometheusRenderer.format:
+            return Response({"actions": registry.histograms()})
+        return Response({"actions": registry.summary()})
@@ -65,6 +65,32 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+PERFORMANCE_METRICS = (
+    os.getenv("PERFORMANCE_METRICS", default="True") == "True"
+)
+PERFORMANCE_SERVER_TIMING = (
+    os.getenv("PERFORMANCE_SERVER_TIMING", default="False") == "True"
+)
+PERFORMANCE_LOG = os.getenv("PERFORMANCE_LOG", default="False") == "True"
+
+if PERFORMANCE_METRICS:
+    MIDDLEWARE.insert(0, "api.performance.PerformanceMiddleware")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.performance": {
+            "handlers": ["console"],
+            "level": "INFO" if PERFORMANCE_LOG else "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 ROOT_URLCONF = "foodgram.urls"
 
 TEMPLATES = [
@@ -102,6 +128,21 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default="foodgram"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", default=10000)),
+        },
+    }
+}
+
+ESTIMATED_COUNTS = os.getenv("ESTIMATED_COUNTS", default="False") == "True"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -144,12 +185,37 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+RECIPE_IMAGE_WORKERS = int(os.getenv("RECIPE_IMAGE_WORKERS", default=2))
+RECIPE_IMAGE_MAX_SIZE = int(os.getenv("RECIPE_IMAGE_MAX_SIZE", default=1920))
+RECIPE_IMAGE_PLACEHOLDER = os.getenv(
+    "RECIPE_IMAGE_PLACEHOLDER",
+    default=STATIC_URL + "api/recipe-placeholder.svg",
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+JSON_BACKEND = os.getenv("JSON_BACKEND", default="orjson")
+
+if JSON_BACKEND == "orjson":
+    JSON_RENDERER = "api.renderers.FastJSONRenderer"
+    JSON_PARSER = "api.parsers.FastJSONParser"
+else:
+    JSON_RENDERER = "rest_framework.renderers.JSONRenderer"
+    JSON_PARSER = "rest_framework.parsers.JSONParser"
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": (
+        JSON_RENDERER,
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        JSON_PARSER,
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.TokenAuthentication",
     ),
@@ -27,11 +27,9 @@ class IngredientAdmin(ImportExportModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "count_favorites")
-    list_filter = ("author", "name", "tags")
-
-    def count_favorites(self, obj):
-        return obj.favorited_recipe.count()
+    list_display = ("name", "author", "favorites_count", "in_carts_count")
+    list_filter = ("author", "tags")
+    search_fields = ("name",)
 
 
 admin.site.register(RecipeIngredient)
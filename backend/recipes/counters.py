@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import AuthorStatistics
+from .models import FavoritedRecipe, Recipe, ShoppingCart
+
+User = get_user_model()
+
+RECIPE_COUNTERS = {
+    FavoritedRecipe: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+
+def change_recipe_counter(model, recipe_id, delta):
+    field = RECIPE_COUNTERS[model]
+    Recipe.objects.filter(id=recipe_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def change_recipes_count(author_id, delta):
+    updated = AuthorStatistics.objects.filter(author_id=author_id).update(
+        recipes_count=Greatest(F("recipes_count") + delta, 0)
+    )
+    if (
+        not updated and delta > 0
+        and User.objects.filter(id=author_id).exists()
+    ):
+        AuthorStatistics.objects.get_or_create(
+            author_id=author_id,
+            defaults={
+                "recipes_count": Recipe.objects.filter(
+                    author_id=author_id
+                ).count()
+            },
+        )
+
+
+def count_related(model, field, outer_field="pk"):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def repair_recipe_counters():
+    repaired = {}
+    for model, field in RECIPE_COUNTERS.items():
+        actual = count_related(model, "recipe")
+        repaired[field] = (
+            Recipe.objects.exclude(**{field: actual}).update(**{field: actual})
+        )
+    return repaired
+
+
+def repair_recipes_counts():
+    created = AuthorStatistics.objects.bulk_create(
+        (
+            AuthorStatistics(author_id=user_id)
+            for user_id in User.objects.filter(
+                statistics__isnull=True
+            ).values_list("id", flat=True).iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    actual = count_related(Recipe, "author", "author_id")
+    updated = AuthorStatistics.objects.exclude(recipes_count=actual).update(
+        recipes_count=actual
+    )
+    return len(created), updated
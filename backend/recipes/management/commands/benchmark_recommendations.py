@@ -0,0 +1,163 @@
+import time
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from recipes.models import Recipe, RecommendedRecipe
+from recipes.recommendations import (BATCH_SIZE, CART_WEIGHT,
+                                     FAVORITE_WEIGHT, FEED_SIZE, NEIGHBORS,
+                                     compute_recommendations, get_matrices,
+                                     save_rows)
+
+User = get_user_model()
+
+
+def generate_matrices(options):
+    rng = np.random.default_rng(options["seed"])
+    n_users, n_items = options["users"], options["recipes"]
+    popularity = 1 / np.arange(1, n_items + 1) ** 0.8
+    popularity /= popularity.sum()
+    rows, cols, values = [], [], []
+    for mean, weight in (
+        (options["favorites"], FAVORITE_WEIGHT),
+        (options["carts"], CART_WEIGHT),
+    ):
+        counts = rng.poisson(mean, n_users)
+        rows.append(np.repeat(np.arange(n_users), counts))
+        cols.append(rng.choice(n_items, counts.sum(), p=popularity))
+        values.append(np.full(counts.sum(), weight))
+    authors = rng.choice(n_users, options["authors"], replace=False)
+    follow_counts = rng.poisson(options["follows"], n_users)
+    follow_rows = np.repeat(np.arange(n_users), follow_counts)
+    follow_cols = authors[rng.integers(0, len(authors), len(follow_rows))]
+    follow_keys = np.unique(follow_rows * n_users + follow_cols)
+    return get_matrices(
+        n_users,
+        n_items,
+        np.concatenate(rows),
+        np.concatenate(cols),
+        np.concatenate(values),
+        follow_keys // n_users,
+        follow_keys % n_users,
+        authors[rng.integers(0, len(authors), n_items)],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет расчет рекомендаций на синтетических данных и, с --serve, "
+        "запрос ленты рекомендаций к тестовой базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--recipes", type=int, default=50000)
+        parser.add_argument("--authors", type=int, default=5000)
+        parser.add_argument(
+            "--favorites", type=float, default=20,
+            help="Среднее число избранных рецептов на пользователя",
+        )
+        parser.add_argument(
+            "--carts", type=float, default=5,
+            help="Среднее число рецептов в списке покупок",
+        )
+        parser.add_argument(
+            "--follows", type=float, default=3,
+            help="Среднее число подписок на пользователя",
+        )
+        parser.add_argument("--neighbors", type=int, default=NEIGHBORS)
+        parser.add_argument("--feed-size", type=int, default=FEED_SIZE)
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument(
+            "--serve", action="store_true",
+            help="Записать ленты в тестовую базу и замерить запрос ленты",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=1000,
+            help="Количество запросов ленты в режиме --serve",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        state = generate_matrices(options)
+        self.stdout.write(
+            f"Пользователей - {options['users']:,}, рецептов - "
+            f"{options['recipes']:,}, взаимодействий - "
+            f"{len(state['matrix'][1]):,}, подписок - "
+            f"{len(state['follows'][1]):,} "
+            f"({time.perf_counter() - started:.2f} с)"
+        )
+        _, feeds, timings = compute_recommendations(
+            state, options["neighbors"], options["feed_size"],
+            options["workers"],
+        )
+        self.stdout.write(
+            f"Сходство {timings['neighbors_seconds']:.2f} с, ленты "
+            f"{timings['feeds_seconds']:.2f} с, рекомендаций - "
+            f"{len(feeds[0]):,}"
+        )
+        if options["serve"]:
+            self.serve(options, feeds)
+
+    def serve(self, options, feeds):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            started = time.perf_counter()
+            user_ids = np.arange(1, options["users"] + 1)
+            recipe_ids = np.arange(1, options["recipes"] + 1)
+            User.objects.bulk_create(
+                (
+                    User(id=pk, username=f"user{pk}",
+                         email=f"user{pk}@example.com")
+                    for pk in user_ids.tolist()
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            Recipe.objects.bulk_create(
+                (
+                    Recipe(id=pk, author_id=1, name=f"recipe{pk}",
+                           image="recipes/benchmark.png", text="text",
+                           cooking_time=10)
+                    for pk in recipe_ids.tolist()
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            users, recipes, scores = feeds
+            save_rows(
+                RecommendedRecipe,
+                ("user", "recipe", "score"),
+                (user_ids[users], recipe_ids[recipes], scores),
+            )
+            self.stdout.write(
+                f"Запись в тестовую базу "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+            rng = np.random.default_rng(options["seed"])
+            durations = []
+            for user_id in rng.choice(
+                user_ids[np.unique(users)], options["requests"]
+            ).tolist():
+                started = time.perf_counter()
+                list(
+                    Recipe.objects.filter(recommendations__user_id=user_id)
+                    .order_by("-recommendations__score", "-id")
+                    .values_list("id", flat=True)[:6]
+                )
+                durations.append(time.perf_counter() - started)
+            durations.sort()
+            self.stdout.write(
+                f"Запрос ленты: p50 "
+                f"{durations[len(durations) // 2] * 1000:.2f} мс, p95 "
+                f"{durations[len(durations) * 95 // 100] * 1000:.2f} мс"
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from recipes.recommendations import (FEED_SIZE, NEIGHBORS,
+                                     build_recommendations)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает похожие рецепты по избранному и спискам покупок и "
+        "рекомендации для пользователей"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--neighbors", type=int, default=NEIGHBORS,
+            help="Количество похожих рецептов для каждого рецепта",
+        )
+        parser.add_argument(
+            "--feed-size", type=int, default=FEED_SIZE,
+            help="Количество рекомендаций для каждого пользователя",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Количество процессов, по умолчанию по числу ядер",
+        )
+
+    def handle(self, *args, **options):
+        stats = build_recommendations(
+            options["neighbors"], options["feed_size"], options["workers"]
+        )
+        self.stdout.write(
+            f"Похожих рецептов - {stats['neighbors']}, рекомендаций - "
+            f"{stats['recommendations']} для {stats['users']} пользователей"
+        )
+        self.stdout.write(
+            f"Сходство {stats['neighbors_seconds']:.2f} с, ленты "
+            f"{stats['feeds_seconds']:.2f} с, "
+            f"запись {stats['save_seconds']:.2f} с"
+        )
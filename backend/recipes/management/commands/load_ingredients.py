@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from import_export.signals import post_import
+
+from recipes.models import Ingredient
+
+FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl"}
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item["name"], item["measurement_unit"]
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item["name"], item["measurement_unit"]
+
+
+READERS = {"csv": read_csv, "json": read_json, "jsonl": read_jsonl}
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает ингредиенты из CSV (название,единица), JSON или JSON "
+        "Lines, пропуская уже существующие пары название/единица"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с ингредиентами")
+        parser.add_argument(
+            "--format", choices=sorted(READERS), default=None,
+            help="Формат файла, по умолчанию определяется по расширению",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Количество строк в одном INSERT",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Показать изменения, ничего не записывая",
+        )
+        parser.add_argument(
+            "--show", type=int, default=20,
+            help="Сколько новых ингредиентов показать в режиме --dry-run",
+        )
+
+    def get_rows(self, path, file_format):
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lower()
+            if extension not in FORMATS:
+                raise CommandError(
+                    f"Не удалось определить формат файла {path}, "
+                    f"укажите --format"
+                )
+            file_format = FORMATS[extension]
+        with open(path, encoding="utf-8") as file:
+            for name, measurement_unit in READERS[file_format](file):
+                name, measurement_unit = name.strip(), measurement_unit.strip()
+                if name and measurement_unit:
+                    yield name, measurement_unit
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["path"]):
+            raise CommandError(f"Файл {options['path']} не найден")
+        started = time.perf_counter()
+        existing = set(
+            Ingredient.objects.values_list("name", "measurement_unit")
+        )
+        added = set()
+        stats = {"rows": 0, "duplicates": 0, "present": 0, "created": 0}
+
+        def new_rows():
+            for key in self.get_rows(options["path"], options["format"]):
+                stats["rows"] += 1
+                if key in existing:
+                    stats["present"] += 1
+                elif key in added:
+                    stats["duplicates"] += 1
+                else:
+                    added.add(key)
+                    yield key
+
+        if options["dry_run"]:
+            for index, (name, measurement_unit) in enumerate(new_rows()):
+                stats["created"] += 1
+                if index < options["show"]:
+                    self.stdout.write(f"+ {name}, {measurement_unit}")
+        else:
+            with transaction.atomic():
+                for batch in batched(new_rows(), options["batch_size"]):
+                    Ingredient.objects.bulk_create(
+                        Ingredient(name=name, measurement_unit=unit)
+                        for name, unit in batch
+                    )
+                    stats["created"] += len(batch)
+            if stats["created"]:
+                post_import.send(sender=self.__class__, model=Ingredient)
+                if isinstance(cache, LocMemCache):
+                    self.stderr.write(self.style.WARNING(
+                        "Кэш в памяти процесса: запущенные процессы API "
+                        "увидят новые ингредиенты только после перезапуска. "
+                        "Для сброса кэша без перезапуска нужен общий кэш "
+                        "(CACHE_BACKEND)"
+                    ))
+        elapsed = time.perf_counter() - started
+        action = "будет добавлено" if options["dry_run"] else "добавлено"
+        self.stdout.write(
+            f"Строк в файле - {stats['rows']}, повторов в файле - "
+            f"{stats['duplicates']}, уже в базе - {stats['present']}, "
+            f"{action} - {stats['created']}"
+        )
+        self.stdout.write(
+            f"{elapsed:.2f} с, {stats['rows'] / elapsed:,.0f} строк/с"
+        )
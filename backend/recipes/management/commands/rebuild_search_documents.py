@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_documents
+
+
+class Command(BaseCommand):
+    help = "Пересобирает поисковые документы всех рецептов"
+
+    def handle(self, *args, **options):
+        recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+        update_search_documents(recipe_ids)
+        self.stdout.write(f"Обновлено документов - {len(recipe_ids)}")
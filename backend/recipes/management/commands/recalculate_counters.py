@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import repair_recipe_counters, repair_recipes_counts
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики избранного, корзин и рецептов авторов"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for field, repaired in repair_recipe_counters().items():
+            self.stdout.write(f"{field}: исправлено рецептов - {repaired}")
+        created, repaired = repair_recipes_counts()
+        self.stdout.write(
+            f"recipes_count: создано записей - {created}, "
+            f"исправлено - {repaired}"
+        )
@@ -0,0 +1,90 @@
+# Generated by Django 3.2.14 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+PATTERN_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ingredient_name_upper_idx "
+    "ON recipes_ingredient (UPPER(name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS recipe_name_upper_idx "
+    "ON recipes_recipe (UPPER(name) text_pattern_ops)",
+)
+DROP_INDEXES = (
+    "DROP INDEX IF EXISTS ingredient_name_upper_idx",
+    "DROP INDEX IF EXISTS recipe_name_upper_idx",
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in PATTERN_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in DROP_INDEXES:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="favoritedrecipe",
+            options={
+                "verbose_name": "Избранный рецепт",
+                "verbose_name_plural": "Избранные рецепты",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="ingredient",
+            options={
+                "ordering": ["id"],
+                "verbose_name": "Ингредиент",
+                "verbose_name_plural": "Ингредиенты",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="recipeingredient",
+            options={
+                "verbose_name": "Ингредиенты рецепта",
+                "verbose_name_plural": "Ингредиенты рецептов",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="shoppingcart",
+            options={
+                "verbose_name": "Список покупок",
+                "verbose_name_plural": "Списки покупок",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="tag",
+            options={
+                "ordering": ["name"],
+                "verbose_name": "Тэг",
+                "verbose_name_plural": "Тэги",
+            },
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                upload_to="recipes/", verbose_name="Изображение"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["name"], name="ingredient_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["name"], name="recipe_name_idx"),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.14 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Обрабатывается"),
+                    ("ready", "Готово"),
+                    ("failed", "Ошибка обработки"),
+                ],
+                default="ready",
+                editable=False,
+                max_length=10,
+                verbose_name="Обработка изображения",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.14 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_image_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="thumbnails_for",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=100,
+                verbose_name="Изображение, для которого созданы миниатюры",
+            ),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 3.2.14 on 2026-10-18 05:54
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import OperationalError, migrations, models, transaction
+
+DOCUMENT_TABLE = "recipes_recipesearchdocument"
+FTS_TABLE = "recipes_recipesearch_fts"
+POSTGRES_SETUP = (
+    f"ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN vector tsvector "
+    f"GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('russian', title), 'A') || "
+    f"setweight(to_tsvector('russian', body), 'B')) STORED",
+    f"CREATE INDEX recipe_search_vector_idx "
+    f"ON {DOCUMENT_TABLE} USING gin (vector)",
+)
+SQLITE_SETUP = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"title, body, content='{DOCUMENT_TABLE}', content_rowid='recipe_id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert "
+    f"AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, body) "
+    f"VALUES (new.recipe_id, new.title, new.body); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete "
+    f"AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+    f"VALUES ('delete', old.recipe_id, old.title, old.body); END",
+    f"CREATE TRIGGER {FTS_TABLE}_update "
+    f"AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+    f"VALUES ('delete', old.recipe_id, old.title, old.body); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, body) "
+    f"VALUES (new.recipe_id, new.title, new.body); END",
+)
+SQLITE_TEARDOWN = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+
+def create_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for statement in POSTGRES_SETUP:
+            schema_editor.execute(statement)
+    elif vendor == "sqlite":
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in SQLITE_SETUP:
+                    schema_editor.execute(statement)
+        except OperationalError:
+            # SQLite без FTS5: поиск работает через LIKE по документам.
+            pass
+
+
+def drop_search_backend(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_TEARDOWN:
+            schema_editor.execute(statement)
+
+
+def fill_search_documents(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    RecipeSearchDocument = apps.get_model("recipes", "RecipeSearchDocument")
+    words = defaultdict(list)
+    for recipe_id, name in Recipe.tags.through.objects.values_list(
+        "recipe_id", "tag__name"
+    ):
+        words[recipe_id].append(name)
+    for recipe_id, name in RecipeIngredient.objects.values_list(
+        "recipe_id", "ingredient__name"
+    ):
+        words[recipe_id].append(name)
+    RecipeSearchDocument.objects.bulk_create(
+        (
+            RecipeSearchDocument(
+                recipe_id=recipe_id,
+                title=name,
+                body="\n".join((text, " ".join(words[recipe_id]))),
+            )
+            for recipe_id, name, text in Recipe.objects.values_list(
+                "id", "name", "text"
+            ).iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_thumbnails"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSearchDocument",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                ("title", models.TextField(verbose_name="Название")),
+                (
+                    "body",
+                    models.TextField(
+                        verbose_name="Текст, теги и ингредиенты"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Поисковый документ рецепта",
+                "verbose_name_plural": "Поисковые документы рецептов",
+            },
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 3.2.14 on 2026-10-18 06:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0006_search_documents"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecommendedRecipe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Оценка")),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Рекомендованный рецепт",
+                "verbose_name_plural": "Рекомендованные рецепты",
+            },
+        ),
+        migrations.CreateModel(
+            name="RecipeNeighbor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Сходство")),
+                (
+                    "neighbor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.recipe",
+                        verbose_name="Похожий рецепт",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbors",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий рецепт",
+                "verbose_name_plural": "Похожие рецепты",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="recommendedrecipe",
+            index=models.Index(
+                fields=["user", "-score"], name="recommendation_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recommendedrecipe",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"), name="unique_recommended_recipe"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeneighbor",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "neighbor"), name="unique_recipe_neighbor"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.14 on 2026-10-18 07:40
+
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx "
+    "ON recipes_ingredient USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS recipe_name_trgm_idx "
+    "ON recipes_recipe USING gin (UPPER(name) gin_trgm_ops)",
+)
+DROP_INDEXES = (
+    "DROP INDEX IF EXISTS ingredient_name_trgm_idx",
+    "DROP INDEX IF EXISTS recipe_name_trgm_idx",
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in TRIGRAM_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in DROP_INDEXES:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recommendations"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
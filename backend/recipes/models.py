@@ -14,6 +14,9 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ["id"]
+        indexes = [
+            models.Index(fields=["name"], name="ingredient_name_idx"),
+        ]
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
 
@@ -37,6 +40,12 @@ class Tag(models.Model):
         return self.name
 
 
+class ImageStatus(models.TextChoices):
+    PENDING = "pending", "Обрабатывается"
+    READY = "ready", "Готово"
+    FAILED = "failed", "Ошибка обработки"
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -56,6 +65,19 @@ class Recipe(models.Model):
         blank=False,
         null=False,
     )
+    image_status = models.CharField(
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False,
+        verbose_name="Обработка изображения",
+    )
+    thumbnails_for = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name="Изображение, для которого созданы миниатюры",
+    )
     text = models.TextField(
         "Описание рецепта",
         help_text="Введите описание рецепта",
@@ -74,9 +96,18 @@ class Recipe(models.Model):
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name="Время приготовления", blank=False, null=False
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Добавлений в избранное"
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Добавлений в корзину"
+    )
 
     class Meta:
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["name"], name="recipe_name_idx"),
+        ]
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
 
@@ -84,6 +115,25 @@ class Recipe(models.Model):
         return self.name
 
 
+class RecipeSearchDocument(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+        verbose_name="Рецепт",
+    )
+    title = models.TextField(verbose_name="Название")
+    body = models.TextField(verbose_name="Текст, теги и ингредиенты")
+
+    class Meta:
+        verbose_name = "Поисковый документ рецепта"
+        verbose_name_plural = "Поисковые документы рецептов"
+
+    def __str__(self):
+        return self.title
+
+
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -169,3 +219,66 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'Список покупок пользователя "{self.user.username}"'
+
+
+class RecipeNeighbor(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="neighbors",
+        verbose_name="Рецепт",
+    )
+    neighbor = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(verbose_name="Сходство")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "neighbor"],
+                name="unique_recipe_neighbor",
+            )
+        ]
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+
+    def __str__(self):
+        return f'Рецепт "{self.neighbor}", похожий на "{self.recipe}"'
+
+
+class RecommendedRecipe(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="Пользователь",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        verbose_name="Рецепт",
+    )
+    score = models.FloatField(verbose_name="Оценка")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_recommended_recipe",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score"], name="recommendation_user_idx"
+            ),
+        ]
+        verbose_name = "Рекомендованный рецепт"
+        verbose_name_plural = "Рекомендованные рецепты"
+
+    def __str__(self):
+        return f'Рекомендация "{self.recipe}" для "{self.user}"'
@@ -0,0 +1,288 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+from django.db import connection, connections, transaction
+
+from users.models import Subscription
+from .models import (FavoritedRecipe, Recipe, RecipeNeighbor,
+                     RecommendedRecipe, ShoppingCart)
+
+FAVORITE_WEIGHT = 1.0
+CART_WEIGHT = 0.5
+SUBSCRIPTION_WEIGHT = 0.1
+NEIGHBORS = 20
+FEED_SIZE = 50
+BLOCK_SIZE = 1024
+BLOCK_WORK = 2000000
+BATCH_SIZE = 5000
+DENSE_RATIO = 4
+
+_state = {}
+
+
+def get_csr(rows, cols, values, size):
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, cols[order], values[order]
+
+
+def expand(matrix, rows, weights):
+    indptr, cols, values = matrix
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    pairs = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - (np.cumsum(lengths) - lengths)[pairs]
+    positions = starts[pairs] + offsets
+    return pairs, cols[positions], values[positions] * weights[pairs]
+
+
+def aggregate(rows, cols, values, n_rows, n_cols):
+    if n_rows * n_cols <= DENSE_RATIO * len(rows):
+        sums = np.bincount(
+            rows * n_cols + cols, weights=values, minlength=n_rows * n_cols
+        )
+        keys = np.flatnonzero(sums)
+        return keys // n_cols, keys % n_cols, sums[keys]
+    keys, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+    return keys // n_cols, keys % n_cols, np.bincount(inverse, weights=values)
+
+
+def top_per_row(rows, cols, scores, k):
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = (ranks < k) & (scores > 0)
+    return rows[keep], cols[keep], scores[keep]
+
+
+def get_matrices(n_users, n_items, rows, cols, values, follow_rows,
+                 follow_cols, recipe_authors):
+    rows, cols, values = aggregate(rows, cols, values, n_users, n_items)
+    follows = np.ones(len(follow_rows))
+    return {
+        "n_items": n_items,
+        "matrix": get_csr(rows, cols, values, n_users),
+        "items": get_csr(cols, rows, values, n_items),
+        "norms": np.sqrt(np.bincount(cols, values ** 2, minlength=n_items)),
+        "follows": get_csr(follow_rows, follow_cols, follows, n_users),
+        "authored": get_csr(
+            recipe_authors, np.arange(n_items), np.ones(n_items), n_users
+        ),
+    }
+
+
+def init_worker(state):
+    _state.clear()
+    _state.update(state)
+
+
+def compute_neighbors_block(items):
+    norms = _state["norms"]
+    local, users, weights = expand(
+        _state["items"], items, np.ones(len(items))
+    )
+    pairs, neighbors, products = expand(_state["matrix"], users, weights)
+    rows, cols, dots = aggregate(
+        local[pairs], neighbors, products, len(items), _state["n_items"]
+    )
+    other = cols != items[rows]
+    rows, cols, dots = rows[other], cols[other], dots[other]
+    rows, cols, scores = top_per_row(
+        rows, cols, dots / (norms[items[rows]] * norms[cols]),
+        _state["neighbors"],
+    )
+    return items[rows], cols, scores
+
+
+def compute_feed_chunk(users):
+    n_items = _state["n_items"]
+    ones = np.ones(len(users))
+    local, items, weights = expand(_state["matrix"], users, ones)
+    pairs, candidates, scores = expand(
+        _state["neighbor_matrix"], items, weights
+    )
+    follow_local, authors, _ = expand(_state["follows"], users, ones)
+    recipe_pairs, recipes, _ = expand(
+        _state["authored"], authors, np.ones(len(authors))
+    )
+    rows, cols, scores = aggregate(
+        np.concatenate((local[pairs], follow_local[recipe_pairs])),
+        np.concatenate((candidates, recipes)),
+        np.concatenate((
+            scores, np.full(len(recipes), SUBSCRIPTION_WEIGHT)
+        )),
+        len(users),
+        n_items,
+    )
+    own_local, own, _ = expand(_state["authored"], users, ones)
+    keep = ~np.isin(
+        rows * n_items + cols,
+        np.concatenate((local * n_items + items, own_local * n_items + own)),
+    )
+    rows, cols, scores = top_per_row(
+        rows[keep], cols[keep], scores[keep], _state["feed_size"]
+    )
+    return users[rows], cols, scores
+
+
+def get_item_blocks(state):
+    indptr, users, _ = state["items"]
+    user_lengths = np.diff(state["matrix"][0])
+    item_lengths = np.diff(indptr)
+    work = np.bincount(
+        np.repeat(np.arange(state["n_items"]), item_lengths),
+        weights=user_lengths[users],
+        minlength=state["n_items"],
+    )
+    blocks, block, total = [], [], 0
+    for item in np.flatnonzero(item_lengths).tolist():
+        if block and (
+            len(block) >= BLOCK_SIZE or total + work[item] > BLOCK_WORK
+        ):
+            blocks.append(np.array(block))
+            block, total = [], 0
+        block.append(item)
+        total += work[item]
+    if block:
+        blocks.append(np.array(block))
+    return blocks
+
+
+def get_user_chunks(state):
+    active = (
+        (np.diff(state["matrix"][0]) > 0) | (np.diff(state["follows"][0]) > 0)
+    )
+    users = np.flatnonzero(active)
+    return [
+        users[start:start + BLOCK_SIZE]
+        for start in range(0, len(users), BLOCK_SIZE)
+    ]
+
+
+def run_tasks(function, tasks, state, workers):
+    if workers <= 1:
+        init_worker(state)
+        results = [function(task) for task in tasks]
+    else:
+        connections.close_all()
+        with ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(state,)
+        ) as executor:
+            results = list(executor.map(function, tasks))
+    if not results:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def compute_recommendations(state, neighbors=NEIGHBORS, feed_size=FEED_SIZE,
+                            workers=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    state = dict(state, neighbors=neighbors, feed_size=feed_size)
+    timings = {}
+    started = time.perf_counter()
+    items, similar, scores = run_tasks(
+        compute_neighbors_block, get_item_blocks(state), state, workers
+    )
+    timings["neighbors_seconds"] = time.perf_counter() - started
+    started = time.perf_counter()
+    state["neighbor_matrix"] = get_csr(
+        items, similar, scores, state["n_items"]
+    )
+    feeds = run_tasks(
+        compute_feed_chunk, get_user_chunks(state), state, workers
+    )
+    timings["feeds_seconds"] = time.perf_counter() - started
+    return (items, similar, scores), feeds, timings
+
+
+def fetch_array(queryset, *fields):
+    return np.array(
+        list(queryset.values_list(*fields)), dtype=np.int64
+    ).reshape(-1, len(fields))
+
+
+def load_matrices():
+    recipes = fetch_array(Recipe.objects.order_by("id"), "id", "author_id")
+    favorites = fetch_array(FavoritedRecipe.objects, "user_id", "recipe_id")
+    carts = fetch_array(ShoppingCart.objects, "user_id", "recipe_id")
+    follows = fetch_array(Subscription.objects, "user_id", "author_id")
+    recipe_ids = recipes[:, 0]
+    user_ids = np.unique(np.concatenate((
+        recipes[:, 1], favorites[:, 0], carts[:, 0], follows.ravel(),
+    )))
+    state = get_matrices(
+        len(user_ids),
+        len(recipe_ids),
+        np.searchsorted(user_ids, np.concatenate(
+            (favorites[:, 0], carts[:, 0])
+        )),
+        np.searchsorted(recipe_ids, np.concatenate(
+            (favorites[:, 1], carts[:, 1])
+        )),
+        np.concatenate((
+            np.full(len(favorites), FAVORITE_WEIGHT),
+            np.full(len(carts), CART_WEIGHT),
+        )),
+        np.searchsorted(user_ids, follows[:, 0]),
+        np.searchsorted(user_ids, follows[:, 1]),
+        np.searchsorted(user_ids, recipes[:, 1]),
+    )
+    return state, user_ids, recipe_ids
+
+
+def save_rows(model, fields, columns):
+    operations = connection.ops
+    table = operations.quote_name(model._meta.db_table)
+    names = ", ".join(
+        operations.quote_name(model._meta.get_field(name).column)
+        for name in fields
+    )
+    placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    batch_size = min(
+        BATCH_SIZE, operations.bulk_batch_size(fields, range(BATCH_SIZE))
+    )
+    model.objects.all().delete()
+    with connection.cursor() as cursor:
+        for start in range(0, len(columns[0]), batch_size):
+            rows = list(zip(*(
+                column[start:start + batch_size].tolist()
+                for column in columns
+            )))
+            cursor.execute(
+                f"INSERT INTO {table} ({names}) VALUES "
+                + ", ".join([placeholder] * len(rows)),
+                list(chain.from_iterable(rows)),
+            )
+
+
+def build_recommendations(neighbors=NEIGHBORS, feed_size=FEED_SIZE,
+                          workers=None):
+    state, user_ids, recipe_ids = load_matrices()
+    (items, similar, scores), (users, recipes, ranks), timings = (
+        compute_recommendations(state, neighbors, feed_size, workers)
+    )
+    started = time.perf_counter()
+    with transaction.atomic():
+        save_rows(
+            RecipeNeighbor,
+            ("recipe", "neighbor", "score"),
+            (recipe_ids[items], recipe_ids[similar], scores),
+        )
+        save_rows(
+            RecommendedRecipe,
+            ("user", "recipe", "score"),
+            (user_ids[users], recipe_ids[recipes], ranks),
+        )
+    timings["save_seconds"] = time.perf_counter() - started
+    return {
+        "neighbors": len(items),
+        "recommendations": len(users),
+        "users": len(np.unique(users)),
+        **timings,
+    }
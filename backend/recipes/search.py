@@ -0,0 +1,149 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe, RecipeIngredient, RecipeSearchDocument
+from .transactions import CommitBatch
+
+DOCUMENT_TABLE = RecipeSearchDocument._meta.db_table
+FTS_TABLE = "recipes_recipesearch_fts"
+SEARCH_CONFIG = "russian"
+BATCH_SIZE = 500
+
+_fts_tables = {}
+
+
+def has_fts_table():
+    key = connection.settings_dict["NAME"]
+    if key not in _fts_tables:
+        _fts_tables[key] = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[key]
+
+
+@lru_cache(maxsize=256)
+def compile_like_pattern(pattern, escape):
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == escape:
+            parts.append(re.escape(next(chars, "")))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+def unicode_like(pattern, value, escape=None):
+    if pattern is None or value is None:
+        return None
+    return bool(compile_like_pattern(pattern, escape).fullmatch(str(value)))
+
+
+def register_sqlite_functions(connection):
+    # Встроенный LIKE в SQLite не учитывает регистр только для ASCII.
+    connection.create_function("like", 2, unicode_like)
+    connection.create_function("like", 3, unicode_like)
+
+
+def build_documents(recipe_ids):
+    tags = defaultdict(list)
+    for recipe_id, name in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list("recipe_id", "tag__name"):
+        tags[recipe_id].append(name)
+    ingredients = defaultdict(list)
+    for recipe_id, name in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list("recipe_id", "ingredient__name"):
+        ingredients[recipe_id].append(name)
+    return [
+        RecipeSearchDocument(
+            recipe_id=recipe_id,
+            title=name,
+            body="\n".join(
+                (text, " ".join(tags[recipe_id]),
+                 " ".join(ingredients[recipe_id]))
+            ),
+        )
+        for recipe_id, name, text in Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list("id", "name", "text")
+    ]
+
+
+@transaction.atomic
+def update_search_documents(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        batch = recipe_ids[start:start + BATCH_SIZE]
+        RecipeSearchDocument.objects.filter(recipe_id__in=batch).delete()
+        RecipeSearchDocument.objects.bulk_create(build_documents(batch))
+
+
+search_updates = CommitBatch(update_search_documents)
+
+
+def schedule_search_update(*recipe_ids):
+    search_updates.add(*recipe_ids)
+
+
+def get_fts_query(query):
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+
+
+def get_recipe_column():
+    quote_name = connection.ops.quote_name
+    return (
+        f"{quote_name(Recipe._meta.db_table)}."
+        f"{quote_name(Recipe._meta.pk.column)}"
+    )
+
+
+def search_recipes(queryset, query):
+    recipe_column = get_recipe_column()
+    if connection.vendor == "postgresql":
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(
+            f"SELECT recipe_id FROM {DOCUMENT_TABLE} "
+            f"WHERE vector @@ {tsquery}",
+            (query,),
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank(vector, {tsquery}) FROM {DOCUMENT_TABLE} "
+            f"WHERE recipe_id = {recipe_column}",
+            (query,),
+            output_field=FloatField(),
+        )
+    elif connection.vendor == "sqlite" and has_fts_table():
+        fts_query = get_fts_query(query)
+        if not fts_query:
+            return queryset.none()
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (fts_query,),
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {recipe_column}",
+            (fts_query,),
+            output_field=FloatField(),
+        )
+    else:
+        return queryset.filter(
+            Q(search_document__title__icontains=query)
+            | Q(search_document__body__icontains=query)
+        ).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by("-id")
+    return queryset.filter(id__in=matches).annotate(
+        search_rank=rank
+    ).order_by("-search_rank", "-id")
@@ -0,0 +1,68 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import change_recipe_counter, change_recipes_count
+from .models import (FavoritedRecipe, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .search import register_sqlite_functions, schedule_search_update
+
+
+@receiver(post_save, sender=FavoritedRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def increase_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        change_recipe_counter(sender, instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=FavoritedRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_recipe_counter(sender, instance, **kwargs):
+    change_recipe_counter(sender, instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_recipes_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    change_recipes_count(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_document(sender, instance, **kwargs):
+    schedule_search_update(instance.id)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_ingredients_search_document(sender, instance, **kwargs):
+    schedule_search_update(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tags_search_document(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_search_update(instance.id)
+    elif pk_set:
+        schedule_search_update(*pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_related_search_documents(sender, instance, created, **kwargs):
+    if created:
+        return
+    schedule_search_update(*instance.recipe.values_list("id", flat=True))
+
+
+@receiver(connection_created)
+def register_search_functions(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        register_sqlite_functions(connection.connection)
@@ -0,0 +1,179 @@
+import io
+from unittest import skipUnless
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+
+from users.models import AuthorStatistics
+from .models import (Ingredient, Recipe, RecipeIngredient,
+                     RecipeSearchDocument)
+from .recommendations import (compute_recommendations, get_matrices,
+                              top_per_row)
+from .transactions import CommitBatch
+
+User = get_user_model()
+
+
+class AuthorCountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", email="author@example.com", password="pass"
+        )
+        ingredient = Ingredient.objects.create(
+            name="соль", measurement_unit="г"
+        )
+        for number in range(2):
+            recipe = Recipe.objects.create(
+                author=self.author, name=f"Рецепт {number}",
+                image="recipes/test.png", text="текст", cooking_time=5,
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+
+    def test_recipes_count(self):
+        self.assertEqual(
+            AuthorStatistics.objects.get(author=self.author).recipes_count, 2
+        )
+        Recipe.objects.filter(author=self.author).first().delete()
+        self.assertEqual(
+            AuthorStatistics.objects.get(author=self.author).recipes_count, 1
+        )
+
+    def test_delete_author_with_recipes(self):
+        self.author.delete()
+        self.assertFalse(User.objects.filter(id=self.author.id).exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(AuthorStatistics.objects.exists())
+
+
+class CommitBatchTest(TestCase):
+    def setUp(self):
+        self.flushed = []
+        self.batch = CommitBatch(self.flushed.append)
+
+    def test_one_callback_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.batch.add(1, 2)
+            self.batch.add(2, 3)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.flushed, [{1, 2, 3}])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.batch.add(4)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.flushed, [{1, 2, 3}, {4}])
+
+    def test_rolled_back_items_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.batch.add(1)
+                    raise ValueError
+            except ValueError:
+                pass
+            self.batch.add(2)
+        self.assertEqual(self.flushed, [{2}])
+
+
+class SearchDocumentTest(TestCase):
+    def test_document_follows_recipe(self):
+        author = User.objects.create(
+            username="author", email="author@example.com"
+        )
+        ingredient = Ingredient.objects.create(
+            name="соль", measurement_unit="г"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=author, name="Суп", image="recipes/test.png",
+                text="текст", cooking_time=5,
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+        document = RecipeSearchDocument.objects.get(recipe=recipe)
+        self.assertEqual(document.title, "Суп")
+        self.assertIn("соль", document.body)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = "Борщ"
+            recipe.save()
+        self.assertEqual(
+            RecipeSearchDocument.objects.get(recipe=recipe).title, "Борщ"
+        )
+
+
+class NameSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("Соль", "соль морская", "Сахар", "50%_смесь"):
+            Ingredient.objects.create(name=name, measurement_unit="г")
+
+    def get_names(self, **lookup):
+        return sorted(
+            Ingredient.objects.filter(**lookup).values_list("name", flat=True)
+        )
+
+    def test_case_insensitive_substring(self):
+        self.assertEqual(
+            self.get_names(name__icontains="СОЛЬ"), ["Соль", "соль морская"]
+        )
+        self.assertEqual(self.get_names(name__istartswith="са"), ["Сахар"])
+        self.assertEqual(self.get_names(name__icontains="%_"), ["50%_смесь"])
+        self.assertEqual(self.get_names(name__icontains="л_"), [])
+
+    @skipUnless(connection.vendor == "postgresql",
+                "Планы запросов проверяются только в PostgreSQL")
+    def test_name_lookups_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        call_command("explain_search_queries", stdout=io.StringIO())
+
+
+class RecommendationsTest(TestCase):
+    def get_state(self):
+        interactions = {0: [0, 1], 1: [0, 1, 2], 2: [2, 3]}
+        rows = [user for user, items in interactions.items() for _ in items]
+        cols = [item for items in interactions.values() for item in items]
+        return get_matrices(
+            3, 4, np.array(rows), np.array(cols), np.ones(len(rows)),
+            np.array([0]), np.array([2]), np.array([1, 2, 1, 2]),
+        )
+
+    def group(self, rows, cols, scores):
+        result = {}
+        for row, col, score in zip(rows.tolist(), cols.tolist(),
+                                   scores.tolist()):
+            result.setdefault(row, []).append((col, round(score, 4)))
+        return result
+
+    def test_top_per_row(self):
+        rows, cols, scores = top_per_row(
+            np.array([1, 0, 0, 0, 1]), np.array([4, 3, 1, 2, 0]),
+            np.array([0.0, 0.5, 0.5, 0.9, 0.0]), 2,
+        )
+        self.assertEqual(
+            self.group(rows, cols, scores), {0: [(2, 0.9), (1, 0.5)]}
+        )
+        empty = top_per_row(
+            np.array([0, 1]), np.array([0, 1]), np.zeros(2), 2
+        )
+        self.assertEqual([len(part) for part in empty], [0, 0, 0])
+
+    def test_neighbors_and_feeds(self):
+        neighbors, feeds, _ = compute_recommendations(
+            self.get_state(), neighbors=3, feed_size=5, workers=1
+        )
+        self.assertEqual(self.group(*neighbors), {
+            0: [(1, 1.0), (2, 0.5)],
+            1: [(0, 1.0), (2, 0.5)],
+            2: [(3, 0.7071), (0, 0.5), (1, 0.5)],
+            3: [(2, 0.7071)],
+        })
+        self.assertEqual(self.group(*feeds), {
+            0: [(2, 1.0), (3, 0.1)],
+            1: [(3, 0.7071)],
+            2: [(0, 0.5)],
+        })
@@ -0,0 +1,36 @@
+import threading
+
+from django.db import transaction
+
+
+class CommitBatch:
+    def __init__(self, flush):
+        self.flush = flush
+        self.local = threading.local()
+
+    def is_scheduled(self, connection):
+        callback = getattr(self.local, "callback", None)
+        return callback is not None and any(
+            entry[1] is callback for entry in connection.run_on_commit
+        )
+
+    def schedule(self):
+        items = set()
+
+        def callback():
+            if self.local.callback is callback:
+                self.local.callback = None
+            self.flush(items)
+
+        self.local.items = items
+        self.local.callback = callback
+        transaction.on_commit(callback)
+
+    def add(self, *items):
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            self.flush(set(items))
+            return
+        if not self.is_scheduled(connection):
+            self.schedule()
+        self.local.items.update(items)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 
-from .models import Subscription
+from .models import AuthorStatistics, Subscription
 
 
 class CustomUserAdmin(UserAdmin):
@@ -16,6 +16,17 @@ class CustomUserAdmin(UserAdmin):
     ]
 
 
+@admin.register(AuthorStatistics)
+class AuthorStatisticsAdmin(admin.ModelAdmin):
+    # Счетчик ведут сигналы, пересчитать его можно командой
+    # recalculate_counters.
+    list_display = ("author", "recipes_count")
+    readonly_fields = ("author", "recipes_count")
+
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(Subscription)
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
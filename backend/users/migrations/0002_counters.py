@@ -0,0 +1,78 @@
+# Generated by Django 3.2.14 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_author_statistics(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    AuthorStatistics = apps.get_model("users", "AuthorStatistics")
+    AuthorStatistics.objects.bulk_create(
+        (
+            AuthorStatistics(author_id=user_id, recipes_count=recipes_count)
+            for user_id, recipes_count in User.objects.annotate(
+                total=Count("recipes")
+            ).values_list("id", "total").iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0001_initial"),
+        ("recipes", "0003_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="subscription",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="follower",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Подписчик",
+            ),
+        ),
+        migrations.CreateModel(
+            name="AuthorStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "recipes_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество рецептов"
+                    ),
+                ),
+                (
+                    "author",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика автора",
+                "verbose_name_plural": "Статистика авторов",
+            },
+        ),
+        migrations.RunPython(
+            fill_author_statistics, migrations.RunPython.noop
+        ),
+    ]
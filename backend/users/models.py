@@ -31,3 +31,22 @@ class Subscription(models.Model):
     def __str__(self):
         return f'Подписка пользователя "{self.user.username}" на пользователя' \
                f' "{self.author.username}"'
+
+
+class AuthorStatistics(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        verbose_name="Автор",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество рецептов"
+    )
+
+    class Meta:
+        verbose_name = "Статистика автора"
+        verbose_name_plural = "Статистика авторов"
+
+    def __str__(self):
+        return f'Статистика пользователя "{self.author.username}"'